@@ -1,56 +1,288 @@
+from datetime import datetime
+from io import BytesIO
 import streamlit as st
 import pandas as pd
-from logic.srri_monitoring_transformation_v2 import process_monitoring_file
-from logic.permalink_transformation_v3 import process_and_extract_permalink_file  # <-- Combined function
+from logic.permalink_transformation_v3 import (
+    assemble_permalink_frame, build_permalink_index, iter_permalink_extraction, load_permalink_documents
+)
 from logic.compare_and_export_v2 import compare_srri_values
+from logic.batch_reconcile import batch_output_frames, process_workbooks, reconcile_workbooks, union_identifiers
+from logic.job_runner import CANCELLED, FAILED, FINISHED, JobRunner, job_id_for
+from logic.metrics import MetricsRegistry
+from logic.run_outputs import RunOutputs
+from logic.stage_cache import DEFAULT_TTL, StageCache, file_digest
+from logic.tracing import Trace, span
+
+# How often a running job's progress and partial mismatches are redrawn
+UI_REFRESH_SECONDS = 1.0
+# Longest "Keep processed uploads for" a session can pick; the shared cache keeps results that
+# long, and each session only reuses what is younger than its own setting
+MAX_TTL_MINUTES = 24 * 60
+
+
+@st.cache_resource
+def get_stage_cache():
+    # One memo of stage results per server process, shared by every session and rerun
+    return StageCache(ttl=60 * MAX_TTL_MINUTES)
+
+
+@st.cache_resource
+def get_job_runner():
+    # Background jobs outlive the script run (and the session) that started them
+    return JobRunner()
+
+
+def run_srri_check(job, workbooks, permalink_bytes, permalink_digest, stage_cache, full_scan=False, ttl=None):
+    # Background job: monitoring workbooks + one permalink extraction + a compare per workbook,
+    # reporting through `job`. workbooks is [(name, bytes, digest)]; works on the uploaded
+    # bytes, since the UploadedFile objects belong to the session. Cached stage results older
+    # than ttl seconds (the submitting session's setting) are recomputed
+    job.set_stage("Processing Monitoring Excel")
+    summaries = {}  # digest -> (summary_df, error)
+    pending = []
+    for name, data, digest in workbooks:
+        cached = stage_cache.get("monitoring", digest, max_age=ttl)
+        if cached is not None:
+            summaries[digest] = (cached[0], None)
+        else:
+            pending.append((digest, data))
+    # Workbooks not cached yet are processed in parallel, one process each
+    with span("monitoring", workbooks=len(workbooks), cached=len(workbooks) - len(pending)):
+        processed = process_workbooks([BytesIO(data) for _, data in pending])
+    for (digest, _), (_, summary_df, error) in zip(pending, processed):
+        if error is None:
+            stage_cache.put("monitoring", digest, summary_df)
+        summaries[digest] = (summary_df, error)
+    monitoring = [(name, *summaries[digest]) for name, _, digest in workbooks]
+    failed = [f"{name}: {error}" for name, _, error in monitoring if error is not None]
+    if len(failed) == len(monitoring):
+        raise ValueError("; ".join(failed))
+
+    # Unless full_scan, only share classes in some monitoring summary are extracted: each
+    # comparison inner-joins on Identifier, so every other document would be thrown away
+    identifiers = None if full_scan else union_identifiers(summary_df for _, summary_df, _ in monitoring)
+    scope = {"identifiers": None if full_scan else job_id_for(*identifiers)}
+    cached_extraction = stage_cache.get("permalink", permalink_digest, scope, max_age=ttl)
+    metrics = None  # extraction metrics, when this job extracts
+    if cached_extraction is not None:
+        (merged_df, extracted), stored_at = cached_extraction
+        job.set_context(monitoring=monitoring, merged_df=merged_df, reused_from=stored_at)
+    else:
+        job.set_stage("Processing Permalink CSV")
+        with span("permalink"):
+            permalink_index = stage_cache.get_or_compute(
+                "permalink_index", permalink_digest, lambda: build_permalink_index(BytesIO(permalink_bytes)),
+                max_age=ttl
+            )
+            merged_df = load_permalink_documents(index=permalink_index, identifiers=identifiers)
+        job.set_context(monitoring=monitoring, merged_df=merged_df)
+
+        job.set_stage("Extracting SRRI/Fees", total=len(merged_df))
+        extracted = {}
+        metrics = MetricsRegistry()
+        extraction = iter_permalink_extraction(merged_df, metrics=metrics)
+        try:
+            for index, fields in extraction:
+                extracted[index] = fields
+                job.record(index, fields)
+                if job.cancelled:
+                    return None
+        finally:
+            extraction.close()
+        stage_cache.put("permalink", permalink_digest, (merged_df, extracted), scope)
+
+    job.set_stage("Comparing SRRI values")
+    with span("assemble"):
+        df_permalink = assemble_permalink_frame(merged_df, extracted)
+    reports = reconcile_workbooks(monitoring, df_permalink)
+    # Each stage's output goes to this run's Parquet directory, written in the background
+    outputs = RunOutputs(run_id=job.id, async_writes=True)
+    with span("write_outputs"):
+        for name, df in batch_output_frames(df_permalink, reports).items():
+            outputs.write(name, df)
+    outputs.close(wait=False)  # the job finishes now; the writes land in the background
+    if metrics is not None:
+        metrics.write(outputs.directory)
+    return {
+        "df_permalink": df_permalink,
+        "reports": reports,
+        "output_dir": outputs.directory,
+        "metrics_stats": metrics.format_stats() if metrics is not None else None,
+    }
+
+
+def run_traced_srri_check(job, *args, **kwargs):
+    # run_srri_check with per-stage / per-document timing spans; the JSON trace is written
+    # to the run's output directory and its summary shown under the results
+    trace = Trace("srri_check", run_id=job.id)
+    with trace:
+        result = run_srri_check(job, *args, **kwargs)
+    if result is not None:
+        result["trace_path"] = trace.write(result["output_dir"])
+        result["trace"] = trace.summary()
+    return result
+
+
+@st.fragment(run_every=UI_REFRESH_SECONDS)
+def show_job_progress(job_id):
+    # Polls the running job; once it has finished, rerun the whole page to show its results
+    job = get_job_runner().get(job_id)
+    if job is None or job.snapshot().status in FINISHED:
+        st.rerun()
+    snapshot = job.snapshot()
+
+    if not snapshot.total:
+        st.progress(0.0, text=f"{snapshot.stage}...")
+    else:
+        merged_df = snapshot.context["merged_df"]
+        docs_done = sum(1 + isinstance(merged_df.at[index, "Fact Sheet URL"], str) for index in snapshot.partial)
+        rate = docs_done / max(snapshot.elapsed, 1e-9)
+        st.progress(
+            snapshot.done / snapshot.total,
+            text=f"Extracted {snapshot.done}/{snapshot.total} share classes · {rate:.1f} docs/sec"
+        )
+        df_permalink = assemble_permalink_frame(merged_df, snapshot.partial)
+        for name, summary_df, error in snapshot.context["monitoring"]:
+            if error is not None:
+                continue
+            running_df = compare_srri_values(summary_df, df_permalink)
+            st.caption(f"⏳ {name}: {len(running_df)} mismatches so far")
+            st.dataframe(running_df)
+
+    if st.button("⏹️ Cancel job"):
+        job.cancel()
+
 
 st.set_page_config(page_title="SRRI Update Checker", layout="wide")
 st.title("📊 SRRI Update Checker")
 
+stage_cache = get_stage_cache()
+job_runner = get_job_runner()
+
+# === Cache controls ===
+with st.sidebar:
+    st.header("♻️ Cached results")
+    # Per session: re-uploads older than this are processed again (the shared cache is untouched)
+    ttl = 60 * st.number_input(
+        "Keep processed uploads for (minutes)", min_value=1, max_value=MAX_TTL_MINUTES, value=DEFAULT_TTL // 60, step=5
+    )
+    st.caption(f"{len(stage_cache)} stage results cached")
+    if st.button("🗑️ Clear all cached results"):
+        job_runner.discard()
+        st.success(f"Cleared {stage_cache.invalidate()} cached stage results.")
+
+    st.header("🔎 Extraction scope")
+    full_scan = st.checkbox(
+        "Full scan", value=False,
+        help="Extract every share class in the Permalink CSV, not only those in the monitoring summary."
+    )
+
+    st.header("⏱️ Diagnostics")
+    trace_run = st.checkbox(
+        "Record timing trace", value=False,
+        help="Time every stage and document (download, parse, field extraction) and show where the time went."
+    )
+
 # === File Uploads ===
-file_monitoring = st.file_uploader("Upload SRRI Monitoring Excel", type="xlsx")
+# Several monitoring workbooks are checked against one extraction of the Permalink CSV
+files_monitoring = st.file_uploader("Upload SRRI Monitoring Excel(s)", type="xlsx", accept_multiple_files=True)
 file_permalink = st.file_uploader("Upload Permalink CSV", type="csv")
 
+# === Start or re-attach to the background job ===
+job = None
+if files_monitoring and file_permalink:
+    # The job ID is derived from the uploaded bytes: the same uploads re-attach to the same job
+    workbooks = [(file.name, file.getvalue(), file_digest(file)) for file in files_monitoring]
+    permalink_digest = file_digest(file_permalink)
+    job_id = job_id_for(
+        *(digest for _, _, digest in workbooks), permalink_digest, params={"full_scan": full_scan, "trace": trace_run}
+    )
+    if st.sidebar.button("🔄 Re-process these uploads"):
+        for _, _, digest in workbooks:
+            stage_cache.invalidate(digest=digest)
+        stage_cache.invalidate(digest=permalink_digest)
+        job_runner.discard(job_id)
+    job = job_runner.submit(
+        job_id, run_traced_srri_check if trace_run else run_srri_check,
+        workbooks, file_permalink.getvalue(), permalink_digest, stage_cache, full_scan, ttl=ttl, max_age=ttl
+    )
+    st.session_state["job_id"] = job_id
+    st.query_params["job"] = job_id
+else:
+    # No uploads (e.g. after a browser refresh): pick the last job back up from the session or URL
+    job_id = st.session_state.get("job_id") or st.query_params.get("job")
+    if job_id:
+        job = job_runner.get(job_id, max_age=ttl)
+        if job is None:
+            st.warning(f"Job {job_id} is no longer available. Upload the files again to re-run it.")
+
 # === Main Processing ===
-if file_monitoring and file_permalink:
-    with st.spinner("Processing..."):
-        # STEP 1: Process Monitoring Excel
-        try:
-            df_monitoring = process_monitoring_file(file_monitoring)
-        except Exception as e:
-            st.error(f"❌ Error while processing Monitoring Excel:\n\n{e}")
-            st.stop()
+if job is not None:
+    snapshot = job.snapshot()
+    st.caption(f"🧵 Job {snapshot.id}")
 
-        # STEP 2: Process Permalink CSV + extract SRRI/Fees
-        try:
-            df_permalink = process_and_extract_permalink_file(file_permalink)
-        except Exception as e:
-            st.error(f"❌ Error while processing Permalink CSV or extracting SRRI/Fees:\n\n{e}")
-            st.stop()
+    if snapshot.status not in FINISHED:
+        show_job_progress(snapshot.id)
+        st.stop()
+    if snapshot.status == CANCELLED:
+        st.warning("⏹️ Job cancelled. Use 🔄 in the sidebar to start it again.")
+        st.stop()
+    if snapshot.status == FAILED:
+        st.error(f"❌ Error while {snapshot.stage[:1].lower()}{snapshot.stage[1:]}:\n\n{snapshot.error}")
+        st.stop()
+
+    if "reused_from" in snapshot.context:
+        st.caption(
+            f"♻️ Reused SRRI/Fee extraction from "
+            f"{datetime.fromtimestamp(snapshot.context['reused_from']):%H:%M:%S} "
+            "(use 🔄 in the sidebar to re-process)"
+        )
+    else:
+        st.caption(f"✅ Extracted {snapshot.total} share classes in {snapshot.elapsed:.1f}s")
+    st.caption(f"🗂️ Run outputs (Parquet): {snapshot.result['output_dir']}")
+    if snapshot.result.get("metrics_stats"):
+        st.caption(f"{snapshot.result['metrics_stats']} (metrics.prom / metrics.json in the run outputs)")
+
+    reports = snapshot.result["reports"]
+    with st.expander("🔍 Preview Permalink Data + Extracted Values"):
+        st.dataframe(snapshot.result["df_permalink"])
+
+    # === One report per monitoring workbook ===
+    for position, report in enumerate(reports):
+        if len(reports) > 1:
+            st.subheader(f"📄 {report.name}")
+        if report.error is not None:
+            st.error(f"❌ Error while processing {report.name}:\n\n{report.error}")
+            continue
 
         # === Preview Inputs ===
         with st.expander("🔍 Preview Monitoring Data"):
-            st.dataframe(df_monitoring)
-
-        with st.expander("🔍 Preview Permalink Data + Extracted Values"):
-            st.dataframe(df_permalink)
+            st.dataframe(report.monitoring)
 
         # === Compare SRRI Values ===
-        try:
-            result_df = compare_srri_values(df_monitoring, df_permalink)
-
-            if result_df.empty:
-                st.info("✅ No SRRI mismatches found.")
-            else:
-                st.success(f"⚠️ Found {len(result_df)} mismatches.")
-                st.dataframe(result_df)
-
-                csv_data = result_df.to_csv(index=False).encode("utf-8")
-                st.download_button(
-                    label="📥 Download SRRI Update File",
-                    data=csv_data,
-                    file_name="srri_updates_needed_v2.csv",
-                    mime="text/csv"
-                )
-        except Exception as e:
-            st.error(f"❌ Error comparing SRRI values:\n\n{e}")
+        result_df = report.mismatches
+        if result_df.empty:
+            st.info("✅ No SRRI mismatches found.")
+        else:
+            st.success(f"⚠️ Found {len(result_df)} mismatches.")
+            st.dataframe(result_df)
+
+            csv_data = result_df.to_csv(index=False).encode("utf-8")
+            st.download_button(
+                label="📥 Download SRRI Update File",
+                data=csv_data,
+                file_name="srri_updates_needed_v2.csv" if len(reports) == 1 else
+                f"srri_updates_needed_{report.name.rsplit('.', 1)[0]}.csv",
+                mime="text/csv",
+                key=f"download-{position}"
+            )
+
+    # === Where the time went (traced runs) ===
+    if "trace" in snapshot.result:
+        with st.expander("⏱️ Where the time went"):
+            trace_df = pd.DataFrame(snapshot.result["trace"])
+            stages = trace_df[trace_df["depth"] == 1]
+            st.bar_chart(stages.set_index("span")["total_seconds"])
+            st.caption("Per-document spans overlap across threads: their totals are busy time, not wall-clock time.")
+            st.dataframe(trace_df)
+            st.caption(f"🧭 Full trace: {snapshot.result['trace_path']}")
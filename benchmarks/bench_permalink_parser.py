@@ -0,0 +1,111 @@
+# Benchmark: read-everything + splitlines + regex parsing of the permalink export vs the
+# streaming csv parser in logic/permalink_parser.py, on the sample export scaled up.
+# Run from the repo root: python -m benchmarks.bench_permalink_parser [--copies 10 100 1000]
+import argparse
+import os
+import re
+import tempfile
+import time
+import tracemalloc
+
+from logic.permalink_parser import FACT_SHEET, KIID, iter_permalink_records
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "data", "Permalink File.csv")
+UK_AUDIENCES = {"UK Professional Investor", "UK Retail Investor"}
+
+
+def legacy_parse(path):
+    # Steps 1-5 of load_permalink_documents before the streaming parser
+    with open(path, "r", encoding="utf-8-sig") as f:
+        content = f.read()
+    raw_lines = content.splitlines()
+    kiid_lines = [
+        line.strip() for line in raw_lines
+        if ("UCITS KIID" in line and "KIID.pdf" in line and "English" in line and
+            ("UK Professional Investor" in line or "UK Retail Investor" in line))
+    ]
+    factsheet_lines = [
+        line.strip() for line in raw_lines
+        if ("Fact Sheet" in line and "FactSheet.pdf" in line and "English" in line and
+            ("UK Professional Investor" in line or "UK Retail Investor" in line))
+    ]
+    kiids = []
+    for line in kiid_lines:
+        url_match = re.search(r"https?://\S+?KIID\.pdf", line)
+        isin_match = re.search(r"\bIE[0-9A-Z]{10}\b", line)
+        fields = line.strip('"').split(',')
+        if len(fields) >= 4:
+            third, fourth = fields[2].strip(), fields[3].strip()
+            kiids.append((
+                fields[1].strip(), third if fourth.startswith("IE") else f"{third} - {fourth}",
+                isin_match.group() if isin_match else None, url_match.group() if url_match else None
+            ))
+    factsheets = []
+    for line in factsheet_lines:
+        url_match = re.search(r"https?://\S+?FactSheet\.pdf", line)
+        isin_match = re.search(r"\bIE[0-9A-Z]{10}\b", line)
+        if isin_match:
+            factsheets.append((isin_match.group(), url_match.group() if url_match else None))
+    return kiids, factsheets
+
+
+def streaming_parse(path):
+    kiids = []
+    factsheets = []
+    for record in iter_permalink_records(
+        path, document_types=(KIID, FACT_SHEET), languages=("English",), audiences=UK_AUDIENCES
+    ):
+        if record.document_type == KIID and record.url and record.url.endswith("KIID.pdf"):
+            kiids.append((record.fund_name, record.share_class, record.isin, record.url))
+        elif record.document_type == FACT_SHEET and record.url and record.url.endswith("FactSheet.pdf") and record.isin:
+            factsheets.append((record.isin, record.url))
+    return kiids, factsheets
+
+
+def make_export(copies, directory):
+    # The sample export repeated `copies` times under one header
+    with open(SAMPLE, "r", encoding="utf-8-sig") as f:
+        header, *rows = f.read().splitlines()
+    path = os.path.join(directory, f"permalink_x{copies}.csv")
+    with open(path, "w", encoding="utf-8-sig") as f:
+        f.write(header + "\n")
+        for _ in range(copies):
+            f.write("\n".join(rows) + "\n")
+    return path
+
+
+def measure(func, path):
+    start = time.perf_counter()
+    result = func(path)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run(copy_counts):
+    print(f"{'rows':>9} {'file MB':>8}  {'legacy':>18}  {'streaming':>18}  same")
+    with tempfile.TemporaryDirectory() as directory:
+        for copies in copy_counts:
+            path = make_export(copies, directory)
+            with open(path, "rb") as f:
+                rows = sum(1 for _ in f) - 1
+            legacy, legacy_seconds, legacy_peak = measure(legacy_parse, path)
+            streamed, stream_seconds, stream_peak = measure(streaming_parse, path)
+            print(
+                f"{rows:>9} {os.path.getsize(path) / 1e6:>8.1f}  "
+                f"{legacy_seconds:>7.2f}s {legacy_peak / 1e6:>7.1f} MB  "
+                f"{stream_seconds:>7.2f}s {stream_peak / 1e6:>7.1f} MB  {legacy == streamed}"
+            )
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the legacy permalink export parsing against the streaming csv parser."
+    )
+    parser.add_argument("--copies", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+    run(args.copies)
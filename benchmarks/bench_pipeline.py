@@ -0,0 +1,192 @@
+# Benchmark: every pipeline stage and the whole run, on synthetic inputs from
+# benchmarks/synthetic.py (share classes x weeks) with PDFs served by the local
+# benchmarks/doc_server.py. Per stage it reports run time (p50/p95 over --repeat runs),
+# throughput, per-share-class latency (time until a share class's KIID + Fact Sheet are
+# extracted: p50/p95/p99) and peak memory. Each stage runs in a fresh process so peak RSS
+# is measured per stage: "MB" is the growth during the timed runs (PDF parse processes are
+# not included, except with --parse-workers 1, which parses inline).
+# The compare and end_to_end stages fail unless they find exactly the mismatches the synthetic
+# workbook plants (checked when the document server injects no errors). Exit status 1 when
+# any stage failed.
+# Run from the repo root: python -m benchmarks.bench_pipeline [--share-classes 100 1000] [--weeks 4 52]
+#   scaled up: --share-classes 10000 50000 --weeks 200 --stages monitoring permalink compare
+import argparse
+import itertools
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.doc_server import DocumentServer
+from benchmarks.synthetic import expected_mismatches, make_monitoring_workbook, make_permalink_csv
+
+STAGES = ["monitoring", "permalink", "extraction", "extraction_warm", "compare", "end_to_end"]
+
+
+def _monitoring(options):
+    from logic.srri_monitoring_transformation_v2 import process_monitoring_file
+    return process_monitoring_file(options["workbook"])
+
+
+def _documents(options, df_monitoring):
+    from logic.permalink_transformation_v3 import build_permalink_index, load_permalink_documents
+    index = build_permalink_index(options["permalink"])
+    return load_permalink_documents(index=index, identifiers=sorted(df_monitoring["Identifier"].unique()))
+
+
+def _extract(options, merged_df, cache_dir):
+    # Returns ({row index: fields}, [seconds until each share class was done])
+    from logic.permalink_transformation_v3 import iter_permalink_extraction
+    extracted, latencies = {}, []
+    start = time.perf_counter()
+    for index, fields in iter_permalink_extraction(
+        merged_df, max_workers=options["max_workers"], parse_workers=options["parse_workers"],
+        timeout=options["timeout"], cache_dir=cache_dir
+    ):
+        extracted[index] = fields
+        latencies.append(time.perf_counter() - start)
+    return extracted, latencies
+
+
+def run_stage(stage, options):
+    # Child process: untimed setup for the stage's inputs, then `repeat` timed runs.
+    # Returns seconds per run, items per run, per-item latencies (extraction) and peak memory
+    from logic.batch_reconcile import reconcile_batch
+    from logic.compare_and_export_v2 import compare_srri_values
+    from logic.permalink_transformation_v3 import assemble_permalink_frame
+
+    df_monitoring = merged_df = extracted = None
+    if stage in ("permalink", "extraction", "extraction_warm", "compare"):
+        df_monitoring = _monitoring(options)
+    if stage in ("extraction", "extraction_warm", "compare"):
+        merged_df = _documents(options, df_monitoring)
+    warm_dir = tempfile.mkdtemp(prefix="srri_bench_cache_")  # the cache warm runs start from
+    if stage in ("extraction_warm", "compare"):
+        extracted, _ = _extract(options, merged_df, warm_dir)
+    df_permalink = assemble_permalink_frame(merged_df, extracted) if stage == "compare" else None
+
+    seconds, latencies, items, mismatches = [], [], 0, None
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    for _ in range(options["repeat"]):
+        start = time.perf_counter()
+        if stage == "monitoring":
+            items = len(_monitoring(options))
+        elif stage == "permalink":
+            items = len(_documents(options, df_monitoring))
+        elif stage == "extraction":
+            with tempfile.TemporaryDirectory(prefix="srri_bench_cache_") as cache_dir:
+                done, run_latencies = _extract(options, merged_df, cache_dir)
+            items, latencies = len(done), latencies + run_latencies
+        elif stage == "extraction_warm":
+            done, run_latencies = _extract(options, merged_df, warm_dir)
+            items, latencies = len(done), latencies + run_latencies
+        elif stage == "compare":
+            mismatches = len(compare_srri_values(df_monitoring, df_permalink))
+            items = len(df_permalink)
+        elif stage == "end_to_end":
+            with tempfile.TemporaryDirectory(prefix="srri_bench_cache_") as cache_dir:
+                df_permalink_run, reports = reconcile_batch(
+                    [options["workbook"]], options["permalink"], max_workers=options["max_workers"],
+                    parse_workers=options["parse_workers"], timeout=options["timeout"], cache_dir=cache_dir
+                )
+            items = len(df_permalink_run)
+            mismatches = sum(len(report.mismatches) for report in reports)
+        seconds.append(time.perf_counter() - start)
+        expected = options["expected_mismatches"]
+        if mismatches is not None and expected is not None and mismatches != expected:
+            raise AssertionError(f"{stage} found {mismatches} SRRI mismatches, the workbook plants {expected}")
+    growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before  # KiB on Linux
+    shutil.rmtree(warm_dir, ignore_errors=True)
+    return {"seconds": seconds, "items": items, "latencies": latencies, "peak_mb": growth / 1024}
+
+
+def measure(stage, options):
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_pipeline", "--child", stage, json.dumps(options)],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(f"❌ {stage} failed:\n{result.stderr.strip().splitlines()[-1] if result.stderr.strip() else ''}")
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def format_row(label, stage, stats):
+    seconds = np.array(stats["seconds"])
+    p50, p95 = np.percentile(seconds, [50, 95])
+    rate = stats["items"] / p50 if p50 else float("inf")
+    if stats["latencies"]:
+        latency = "/".join(f"{value * 1000:.0f}" for value in np.percentile(stats["latencies"], [50, 95, 99]))
+    else:
+        latency = "-"
+    return (
+        f"{label:<14} {stage:<16} {stats['items']:>7} {p50:>8.3f}s {p95:>8.3f}s {rate:>10.1f}/s "
+        f"{latency:>18} {stats['peak_mb']:>8.1f}"
+    )
+
+
+def run(args):
+    os.makedirs(args.work_dir, exist_ok=True)
+    server = DocumentServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, pages=args.pages)
+    with server:
+        print(
+            f"📄 Document server at {server.url}: {args.latency * 1000:.0f}±{args.jitter * 1000:.0f} ms, "
+            f"{args.error_rate:.1%} errors; inputs in {args.work_dir}"
+        )
+        print(
+            f"{'size':<14} {'stage':<16} {'items':>7} {'p50':>9} {'p95':>9} {'throughput':>12} "
+            f"{'latency ms p50/95/99':>18} {'MB':>8}"
+        )
+        failed = 0
+        for share_classes, weeks in itertools.product(args.share_classes, args.weeks):
+            # Workbooks are reused between runs; the CSV points at this run's server port
+            workbook = os.path.join(args.work_dir, f"monitoring_{share_classes}x{weeks}.xlsx")
+            if not os.path.exists(workbook):
+                make_monitoring_workbook(workbook, share_classes, weeks)
+            permalink = make_permalink_csv(
+                os.path.join(args.work_dir, f"permalink_{share_classes}.csv"), share_classes, server.url
+            )
+            options = {
+                "workbook": workbook, "permalink": permalink, "repeat": args.repeat,
+                "max_workers": args.max_workers, "parse_workers": args.parse_workers, "timeout": args.timeout,
+                # Failed downloads leave SRRI values empty, which compare as mismatches
+                "expected_mismatches": expected_mismatches(share_classes) if not args.error_rate else None,
+            }
+            for stage in args.stages:
+                stats = measure(stage, options)
+                if stats:
+                    print(format_row(f"{share_classes}x{weeks}", stage, stats))
+                else:
+                    failed += 1
+        print(f"📊 Document server: {server.stats}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark every pipeline stage and the whole run on synthetic inputs and a local document server."
+    )
+    parser.add_argument("--share-classes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--weeks", type=int, nargs="+", default=[4, 52])
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="document server latency (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--pages", type=int, default=3, help="pages per synthetic PDF")
+    parser.add_argument("--max-workers", type=int, default=8)
+    parser.add_argument("--parse-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--timeout", type=float, default=15)
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "srri_bench"))
+    parser.add_argument("--child", nargs=2, metavar=("STAGE", "OPTIONS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(run_stage(args.child[0], json.loads(args.child[1]))))
+    else:
+        sys.exit(run(args))
@@ -0,0 +1,92 @@
+# Benchmark: row-wise df.apply SRRI change detection vs the vectorized summarize_srri_changes.
+# Run from the repo root: python -m benchmarks.bench_srri_changes [--rows 200 2000] [--weeks 17 52]
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from logic.srri_monitoring_transformation_v2 import summarize_srri_changes
+
+
+def legacy_srri_changes(df, srri_columns):
+    # Steps 6 + 7 of process_monitoring_file before vectorization
+    stable = df.apply(lambda row: row[srri_columns].dropna().astype(str).nunique() == 1, axis=1)
+
+    def extract_srri_change_info(row):
+        srri_series = row[srri_columns].dropna()
+        srri_values = srri_series.astype(str).tolist()
+        week_names = srri_series.index.tolist()
+
+        previous_srri = latest_srri = change_week = change_date = None
+        if srri_values:
+            latest_srri = srri_values[-1]
+            previous_srri = next((v for v in reversed(srri_values[:-1]) if v != latest_srri), latest_srri)
+            for i in range(len(srri_values) - 2, -1, -1):
+                if srri_values[i] != latest_srri:
+                    change_week = week_names[i + 1]
+                    corresponding_report_col = change_week.replace("SRRI Result", "SRRI Report")
+                    if corresponding_report_col in row.index:
+                        change_date = row[corresponding_report_col]
+                    break
+
+        return pd.Series({
+            "Previous SRRI": previous_srri,
+            "Latest SRRI": latest_srri,
+            "Week of SRRI Change": change_week,
+            "Date of SRRI Change": change_date
+        })
+
+    info = df.apply(extract_srri_change_info, axis=1)
+    info.insert(0, "SRRI Stable (All Weeks)", stable)
+    return info
+
+
+def make_monitoring_frame(rows, weeks, seed):
+    # Weekly SRRI Report/Result column pairs like the monitoring workbook, with some blank
+    # weeks and an occasional SRRI move
+    rng = np.random.default_rng(seed)
+    base = rng.integers(1, 8, size=rows)
+    moves = rng.random((rows, weeks)) < 0.03
+    srri = np.clip(base[:, None] + np.cumsum(moves * rng.choice([-1, 1], size=(rows, weeks)), axis=1), 1, 7)
+    srri = srri.astype(object)
+    srri[rng.random((rows, weeks)) < 0.1] = np.nan
+    dates = pd.date_range("2025-01-03", periods=weeks, freq="7D").strftime("%Y-%d-%m")
+
+    columns = {"Share Class": [f"Class {i}" for i in range(rows)]}
+    for week in range(weeks):
+        columns[f"SRRI Report (Week {week + 1})"] = np.full(rows, dates[week], dtype=object)
+        columns[f"SRRI Result (Week {week + 1})"] = srri[:, week]
+    df = pd.DataFrame(columns)
+    return df, [col for col in df.columns if "SRRI Result (Week" in col]
+
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run(row_counts, week_counts, seed):
+    print(f"{'rows':>6} {'weeks':>6} {'df.apply':>12} {'vectorized':>12} {'speedup':>8}  same")
+    for rows in row_counts:
+        for weeks in week_counts:
+            df, srri_columns = make_monitoring_frame(rows, weeks, seed)
+            legacy, legacy_seconds = time_call(legacy_srri_changes, df, srri_columns)
+            vectorized, vector_seconds = time_call(summarize_srri_changes, df, srri_columns)
+            same = legacy.astype(str).equals(vectorized.astype(str))
+            print(
+                f"{rows:>6} {weeks:>6} {legacy_seconds * 1000:>10.1f}ms {vector_seconds * 1000:>10.1f}ms "
+                f"{legacy_seconds / vector_seconds:>7.0f}x  {same}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark row-wise SRRI change detection against the vectorized summarize_srri_changes."
+    )
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--weeks", type=int, nargs="+", default=[17, 52])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    run(args.rows, args.weeks, args.seed)
@@ -0,0 +1,79 @@
+# Benchmark: pd.read_excel(header=None) vs the column-pruned monitoring workbook reader
+# (openpyxl read-only, and calamine when python-calamine is installed), on the real
+# workbook and on synthetic ones with more weeks, rows and unrelated columns.
+# Each load runs in a fresh process so peak RSS is measured per reader.
+# Run from the repo root: python -m benchmarks.bench_workbook_reader [--rows 500 5000] [--weeks 52]
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_monitoring_workbook
+
+REAL_WORKBOOK = os.path.join(os.path.dirname(__file__), "..", "data", "SRRI Monitoring First Trust.xlsx")
+READERS = ["read_excel", "openpyxl", "calamine"]
+
+
+def load_once(reader, path):
+    # Child process: load the workbook once, report seconds and peak RSS growth
+    import pandas as pd
+    from logic.workbook_reader import read_monitoring_workbook
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if reader == "read_excel":
+        df = pd.read_excel(path, header=None)
+    else:
+        df, _ = read_monitoring_workbook(path, engine=reader)
+    seconds = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before  # KiB on Linux
+    print(json.dumps({"seconds": seconds, "peak_mb": peak / 1024, "shape": list(df.shape)}))
+
+
+def measure(reader, path):
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_workbook_reader", "--child", reader, path],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(row_counts, week_counts):
+    workbooks = [("real workbook", REAL_WORKBOOK)]
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in row_counts:
+            for weeks in week_counts:
+                path = os.path.join(directory, f"monitoring_{rows}x{weeks}.xlsx")
+                # Plus two unrelated columns per week, which the pruned readers skip
+                make_monitoring_workbook(path, rows, weeks, extra_columns=2)
+                workbooks.append((f"{rows} rows x {weeks} weeks", path))
+
+        print(f"{'workbook':<24} {'size MB':>8}  " + "  ".join(f"{reader:>22}" for reader in READERS))
+        for label, path in workbooks:
+            cells = []
+            for reader in READERS:
+                stats = measure(reader, path)
+                cells.append(
+                    f"{stats['seconds']:>7.2f}s {stats['peak_mb']:>6.1f} MB {stats['shape'][1]:>3}c"
+                    if stats else f"{'n/a':>22}"
+                )
+            print(f"{label:<24} {os.path.getsize(path) / 1e6:>8.1f}  " + "  ".join(f"{cell:>22}" for cell in cells))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark pd.read_excel against the column-pruned monitoring workbook reader."
+    )
+    parser.add_argument("--rows", type=int, nargs="+", default=[500, 5000])
+    parser.add_argument("--weeks", type=int, nargs="+", default=[17, 52])
+    parser.add_argument("--child", nargs=2, metavar=("READER", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        load_once(*args.child)
+    else:
+        run(args.rows, args.weeks)
@@ -0,0 +1,132 @@
+# Local stand-in for the document host: serves the synthetic KIID / Fact Sheet PDFs of
+# benchmarks/synthetic.py with a configurable latency (+ jitter) and error rate, and answers
+# conditional requests (ETag / Last-Modified) with 304 like the real host.
+# In a benchmark: with DocumentServer(latency=0.05) as server: ... server.url ...
+# Standalone: python -m benchmarks.doc_server --port 8765 --latency 0.05 --error-rate 0.01
+import argparse
+import functools
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.synthetic import make_pdf, number_from_path
+
+LAST_MODIFIED = "Mon, 01 Sep 2025 00:00:00 GMT"
+# Generated PDFs kept in memory; at ~2-5 KB each this bounds the server to a few tens of MB
+PDF_CACHE_SIZE = 8192
+
+
+@functools.lru_cache(maxsize=PDF_CACHE_SIZE)
+def _document(number, suffix, pages):
+    body = make_pdf(number, suffix, pages)
+    return body, f'"{hashlib.md5(body).hexdigest()}"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, as the pooled session expects
+
+    def do_GET(self):
+        server = self.server.document_server
+        status = server.next_status()
+        time.sleep(server.next_delay())
+        try:
+            number, suffix = number_from_path(self.path)
+        except (ValueError, IndexError):
+            status = 404
+        if status != 200:
+            self._reply(status)
+            return
+
+        body, etag = _document(number, suffix, server.pages)
+        if self.headers.get("If-None-Match") == etag:
+            self._reply(304, headers={"ETag": etag})
+            return
+        self._reply(200, body, {"Content-Type": "application/pdf", "ETag": etag, "Last-Modified": LAST_MODIFIED})
+
+    def _reply(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+        self.server.document_server.count(status, len(body))
+
+    def log_message(self, *args):
+        pass
+
+
+class DocumentServer:
+    # Threaded HTTP server on 127.0.0.1 (port 0 = any free port), run in a background thread
+
+    def __init__(self, port=0, latency=0.0, jitter=0.0, error_rate=0.0, pages=3, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.pages = pages
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "200": 0, "304": 0, "errors": 0, "bytes": 0}
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.document_server = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def next_status(self):
+        with self._lock:
+            return 503 if self._random.random() < self.error_rate else 200
+
+    def next_delay(self):
+        with self._lock:
+            return max(self.latency + self._random.uniform(-self.jitter, self.jitter), 0.0)
+
+    def count(self, status, size):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["bytes"] += size
+            key = str(status) if status in (200, 304) else "errors"
+            self.stats[key] += 1
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="doc-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve synthetic KIID / Fact Sheet PDFs with configurable latency and error rate."
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--pages", type=int, default=3, help="pages per PDF")
+    args = parser.parse_args()
+    server = DocumentServer(args.port, args.latency, args.jitter, args.error_rate, args.pages)
+    print(f"📄 Serving synthetic KIID / Fact Sheet PDFs at {server.url} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n{server.stats}")
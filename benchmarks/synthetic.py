@@ -0,0 +1,173 @@
+# Synthetic inputs at scale for the benchmarks: permalink exports and SRRI monitoring workbooks
+# with N share classes, and the KIID / Fact Sheet PDFs their URLs point at (served by
+# benchmarks/doc_server.py). Everything is derived from the share class number, so a KIID
+# always states the same SRRI / fee and the monitoring workbook agrees with it except for
+# a chosen share of mismatches.
+# Run from the repo root: python -m benchmarks.synthetic --share-classes 1000 --weeks 52 --out bench_data
+import argparse
+import os
+import string
+
+KIID_SUFFIX = "KIID.pdf"
+FACTSHEET_SUFFIX = "FactSheet.pdf"
+PERMALINK_HEADER = "Document Name,Fund,Share classes,ISINs,Audience,ID path,Language" + "," * 29
+UK_AUDIENCES = "UK Retail Investor, UK Professional Investor"
+# Other rows per share class in a real export: other audiences / languages the loader skips
+NOISE_ROWS = [
+    ("UCITS KIID", "Luxembourg Professional Investor, Netherlands Professional Investor", "English"),
+    ("UCITS KIID", "Germany Retail Investor, Austria Retail Investor", "German"),
+    ("Fact Sheet", "Singapore Professional Investor, Hong Kong Professional Investor", "English"),
+    ("Prospectus", UK_AUDIENCES, "English"),
+]
+IDENTITY_LABELS = ["Fund", "Sub-Fund", "Share Class", "Currency", "last validated document date"]
+
+
+def letters(number):
+    # 0 -> "A", 25 -> "Z", 26 -> "BA", ...: share class names must differ in letters, since
+    # identifiers keep only a-z
+    digits = ""
+    while True:
+        number, remainder = divmod(number, 26)
+        digits = string.ascii_uppercase[remainder] + digits
+        if not number:
+            return digits
+
+
+def sub_fund(number):
+    return f"First Trust Synthetic {letters(number)} UCITS ETF"
+
+
+def isin(number):
+    return f"IE{number:010d}"
+
+
+def srri_for(number):
+    return number * 7919 % 7 + 1
+
+
+def fee_for(number):
+    return round(0.1 + number * 104729 % 90 / 100, 2)
+
+
+def inception_for(number):
+    return f"{number % 28 + 1:02d}.{number % 12 + 1:02d}.{2010 + number % 15}"
+
+
+def document_url(base_url, number, suffix):
+    return f"{base_url.rstrip('/')}/srp/documents-id/{number:08d}/{suffix}"
+
+
+def number_from_path(path):
+    # Inverse of document_url for the document server: ".../<number>/<suffix>" -> (number, suffix)
+    parts = path.rstrip("/").split("/")
+    return int(parts[-2]), parts[-1]
+
+
+def make_permalink_csv(path, share_classes, base_url, noise=True):
+    # Permalink export in the real layout: one English UK KIID + Fact Sheet row per share class,
+    # plus (with noise) the other-audience / language / document rows the loader filters out
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        f.write(PERMALINK_HEADER + "\n")
+        padding = "," * 28
+        for number in range(share_classes):
+            fund = f"Synthetic {letters(number)} UCITS ETF"
+            share_class = f"{sub_fund(number)} A Acc USD"
+            rows = [("UCITS KIID", UK_AUDIENCES, "English", KIID_SUFFIX),
+                    ("Fact Sheet", UK_AUDIENCES, "English", FACTSHEET_SUFFIX)]
+            if noise:
+                rows += [(kind, audiences, language, "Other.pdf") for kind, audiences, language in NOISE_ROWS]
+            for kind, audiences, language, suffix in rows:
+                url = document_url(base_url, number, suffix)
+                f.write(f"{kind},{fund},{share_class},{isin(number)},{audiences},{url},{language}{padding}\n")
+    return path
+
+
+def make_monitoring_workbook(path, share_classes, weeks, change_rate=0.5, mismatch_rate=0.1, extra_columns=0):
+    # Monitoring workbook layout (row 1 week labels, row 2 column labels). A change_rate share
+    # of the share classes move SRRI mid-way (only those reach the monitoring summary); a
+    # mismatch_rate share end on an SRRI that differs from their KIID. extra_columns adds that
+    # many unrelated columns per week, which the workbook reader skips
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    per_week = ["SRRI Report", "SRRI Result"] + [f"Note {i + 1}" for i in range(extra_columns)]
+    sheet.append([None] * len(IDENTITY_LABELS) + [
+        f"Week {week + 1}" if i == 0 else None for week in range(weeks) for i in range(len(per_week))
+    ])
+    sheet.append(IDENTITY_LABELS + per_week * weeks)
+    change_every = round(1 / change_rate) if change_rate else 0
+    mismatch_every = round(1 / mismatch_rate) if mismatch_rate else 0
+    for number in range(share_classes):
+        latest = srri_for(number)
+        if mismatch_every and number % mismatch_every == 0:
+            latest = latest % 7 + 1
+        previous = latest % 7 + 1 if change_every and number % change_every == 0 else latest
+        change_week = weeks // 2
+        row = ["FIRST TRUST GLOBAL FUNDS PLC", sub_fund(number), f"{sub_fund(number)} Class A ACCU", "USD",
+               f"2025-{number % 28 + 1:02d}-05"]
+        for week in range(weeks):
+            row += [f"2025-{week % 28 + 1:02d}-0{week % 9 + 1}", previous if week < change_week else latest]
+            row += ["checked"] * extra_columns
+        sheet.append(row)
+    workbook.save(path)
+    return path
+
+
+def expected_mismatches(share_classes, change_rate=0.5, mismatch_rate=0.1):
+    # SRRI mismatches make_monitoring_workbook plants against the KIIDs, when every document
+    # is extracted: mismatched share classes that also changed SRRI (only those reach the
+    # monitoring summary the comparison joins on)
+    change_every = round(1 / change_rate) if change_rate else 0
+    mismatch_every = round(1 / mismatch_rate) if mismatch_rate else 0
+    if not change_every or not mismatch_every:
+        return 0
+    return sum(1 for number in range(share_classes) if number % change_every == 0 and number % mismatch_every == 0)
+
+
+def kiid_text(number):
+    return (
+        "Key Investor Information\nObjectives and Investment Policy\n"
+        f"{sub_fund(number)} A Acc USD ({isin(number)}) aims to track its index.\n"
+        f"Risk and Reward Profile\n1 2 3 4 5 6 7\nThe fund is in category {srri_for(number)} because of the "
+        "price movements of its investments.\n"
+        "The lowest category does not mean that the investment is risk free.\n"
+    )
+
+
+def make_pdf(number, suffix, pages=3):
+    # KIID (SRRI on page 1, ongoing charges on page 2) or Fact Sheet (inception date on
+    # page 1, then holdings pages) for share class `number`
+    import fitz  # PyMuPDF
+    doc = fitz.open()
+    if suffix == KIID_SUFFIX:
+        doc.new_page().insert_text((50, 72), kiid_text(number), fontsize=9)
+        doc.new_page().insert_text((50, 72), f"Charges\nOngoing charges {fee_for(number):.2f}%\n", fontsize=9)
+    else:
+        doc.new_page().insert_text(
+            (50, 72), f"Fact Sheet\n{sub_fund(number)} A Acc USD\nShare Class Inception: {inception_for(number)}\n",
+            fontsize=9
+        )
+    for page in range(max(pages - len(doc), 0)):
+        doc.new_page().insert_text((50, 72), f"Portfolio holdings {page + 1}\n" + "Holding 1.00%\n" * 40, fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic permalink export and SRRI monitoring workbook."
+    )
+    parser.add_argument("--share-classes", type=int, default=1000)
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--extra-columns", type=int, default=0, help="unrelated columns per week")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8765", help="document server the CSV points at")
+    parser.add_argument("--out", default="bench_data")
+    args = parser.parse_args()
+    os.makedirs(args.out, exist_ok=True)
+    print(make_permalink_csv(os.path.join(args.out, f"permalink_{args.share_classes}.csv"), args.share_classes,
+                             args.base_url))
+    print(make_monitoring_workbook(
+        os.path.join(args.out, f"monitoring_{args.share_classes}x{args.weeks}.xlsx"), args.share_classes,
+        args.weeks, extra_columns=args.extra_columns
+    ))
@@ -1,16 +1,22 @@
 import fitz  # PyMuPDF
-import requests
 from io import BytesIO
 import os
 
-def read_factsheet_pdf(source):
+from logic.pdf_cache import DEFAULT_CACHE_DIR, PdfCache
+from logic.pdf_fetcher import fetch_pdf
+
+def read_factsheet_pdf(source, cache_dir=DEFAULT_CACHE_DIR):
     try:
         # Check if source is a URL or a local file
         if source.startswith("http"):
-            print("🔗 Downloading PDF from URL...")
-            response = requests.get(source, timeout=15)
-            response.raise_for_status()
-            pdf_stream = BytesIO(response.content)
+            print("🔗 Downloading PDF from URL (or local cache)...")
+            cache = PdfCache(cache_dir) if cache_dir else None
+            try:
+                pdf_stream = BytesIO(fetch_pdf(source, cache=cache))
+            finally:
+                if cache is not None:
+                    print(cache.format_stats())
+                    cache.close()
             doc = fitz.open(stream=pdf_stream, filetype="pdf")
         else:
             if not os.path.exists(source):
@@ -29,7 +35,7 @@ def read_factsheet_pdf(source):
     except Exception as e:
         print(f"❌ Error reading PDF: {e}")
 
-# === Example usage ===
+# === Example usage (from the repo root: python -m data.pdf_reader) ===
 
 # Option 1: Remote Fact Sheet URL
 read_factsheet_pdf("https://www.ftglobalportfolios.com/srp/documents-id/c37cc806-5e96-4d09-b610-b1173be5afe4/FactSheet.pdf")
@@ -0,0 +1,127 @@
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from logic.compare_and_export_v2 import compare_srri_values
+from logic.extraction_pipeline import PROCESS_CONTEXT
+from logic.permalink_transformation_v3 import process_and_extract_permalink_file
+from logic.run_outputs import MISMATCHES, MONITORING, PERMALINK
+from logic.srri_monitoring_transformation_v2 import process_monitoring_file
+from logic.tracing import span
+
+# One monitoring workbook's outcome in a batch; error is set (and the frames are None) when
+# the workbook could not be processed
+WorkbookReport = namedtuple("WorkbookReport", ["name", "monitoring", "mismatches", "error"])
+
+
+def workbook_name(file, position=0):
+    # Display name of a workbook given as a path or an uploaded / opened file
+    if isinstance(file, str):
+        return os.path.basename(file)
+    return os.path.basename(getattr(file, "name", "") or f"workbook-{position + 1}")
+
+
+def _unique_names(files):
+    # Same-named workbooks (e.g. from different folders) get a numeric suffix
+    names, seen = [], {}
+    for position, file in enumerate(files):
+        name = workbook_name(file, position)
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else f"{name} ({seen[name]})")
+    return names
+
+
+def process_workbooks(files, engine=None, workers=None):
+    # === Step 1: Monitoring workbooks -> summaries, in parallel ===
+    # Returns [(name, summary_df or None, error or None)] in input order. Each workbook is
+    # parsed in its own process; one that fails is reported and does not stop the others
+    names = _unique_names(files)
+    workers = min(workers or os.cpu_count() or 1, len(files))
+    if workers <= 1:
+        results = []
+        for name, file in zip(names, files):
+            try:
+                results.append((name, process_monitoring_file(file, engine), None))
+            except Exception as e:
+                results.append((name, None, e))
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=PROCESS_CONTEXT) as pool:
+        futures = [pool.submit(process_monitoring_file, file, engine) for file in files]
+        results = []
+        for name, future in zip(names, futures):
+            try:
+                results.append((name, future.result(), None))
+            except Exception as e:
+                results.append((name, None, e))
+    return results
+
+
+def union_identifiers(summaries):
+    # === Step 2: Share classes needed by any workbook ===
+    identifiers = set()
+    for summary_df in summaries:
+        if summary_df is not None:
+            identifiers.update(summary_df["Identifier"])
+    return sorted(identifiers)
+
+
+def reconcile_workbooks(workbooks, df_permalink):
+    # === Step 4: Per-workbook mismatch reports from the shared extraction results ===
+    # workbooks: [(name, summary_df or None, error or None)] as returned by process_workbooks
+    reports = []
+    for name, summary_df, error in workbooks:
+        if error is not None:
+            reports.append(WorkbookReport(name, None, None, error))
+            continue
+        with span("compare", workbook=name):
+            reports.append(WorkbookReport(name, summary_df, compare_srri_values(summary_df, df_permalink), None))
+    return reports
+
+
+def reconcile_batch(monitoring_files, permalink_file, engine=None, workbook_workers=None, full_scan=False,
+                    **extraction_options):
+    # N monitoring workbooks against one permalink export: every KIID / Fact Sheet any of them
+    # needs is fetched and parsed once (unless full_scan, only those share classes).
+    # extraction_options are passed to process_and_extract_permalink_file.
+    # Returns (df_permalink, [WorkbookReport]) in the order of monitoring_files
+    # Workbooks parsed in other processes show up as one "monitoring" span (no per-step detail)
+    with span("monitoring", workbooks=len(monitoring_files)):
+        workbooks = process_workbooks(monitoring_files, engine, workbook_workers)
+    for name, _, error in workbooks:
+        if error is not None:
+            print(f"❌ Failed to process {name}: {error}")
+    if all(error is not None for _, _, error in workbooks):
+        raise ValueError("No monitoring workbook could be processed")
+
+    # === Step 3: One extraction pass for all workbooks ===
+    identifiers = None if full_scan else union_identifiers(summary_df for _, summary_df, _ in workbooks)
+    df_permalink = process_and_extract_permalink_file(permalink_file, identifiers=identifiers, **extraction_options)
+    return df_permalink, reconcile_workbooks(workbooks, df_permalink)
+
+
+def report_output_names(reports):
+    # Output names per report: "monitoring" / "mismatches" for a single workbook, else suffixed
+    # with the workbook name (e.g. "mismatches-srri_monitoring_q3") so reports never collide
+    if len(reports) == 1:
+        return [(MONITORING, MISMATCHES)]
+    names, seen = [], {}
+    for report in reports:
+        slug = re.sub(r"[^0-9A-Za-z]+", "_", report.name.replace(".xlsx", "")).strip("_").lower() or "workbook"
+        seen[slug] = seen.get(slug, 0) + 1
+        if seen[slug] > 1:
+            slug = f"{slug}_{seen[slug]}"
+        names.append((f"{MONITORING}-{slug}", f"{MISMATCHES}-{slug}"))
+    return names
+
+
+def batch_output_frames(df_permalink, reports):
+    # name -> DataFrame of everything a batch run writes: the shared extraction plus each
+    # processed workbook's summary and mismatches
+    frames = {PERMALINK: df_permalink}
+    for report, (monitoring_name, mismatches_name) in zip(reports, report_output_names(reports)):
+        if report.error is None:
+            frames[monitoring_name] = report.monitoring
+            frames[mismatches_name] = report.mismatches
+    return frames
@@ -1,6 +1,6 @@
 import pandas as pd
 
-def compare_srri_values(monitoring_df, permalink_df):
+def compare_srri_values(monitoring_df, permalink_df, output_file=None):
     # Clean column names
     monitoring_df.columns = monitoring_df.columns.str.strip()
     permalink_df.columns = permalink_df.columns.str.strip()
@@ -39,9 +39,9 @@ def compare_srri_values(monitoring_df, permalink_df):
         ]
     ]
 
-    # === Step 4: Save to CSV ===
-    output_file = "srri_updates_needed_v2.csv"
-    result_df.to_csv(output_file, index=False)
+    # === Step 4: Save to CSV (only when an output_file is given) ===
+    if output_file:
+        result_df.to_csv(output_file, index=False)
     return result_df
 
 # print(f"✅ CSV saved with only SRRI changes needed: {output_file}")
@@ -1,6 +1,8 @@
 import pandas as pd
+from logic.run_outputs import MISMATCHES
+from logic.tracing import span
 
-def compare_srri_values(monitoring_df, permalink_df):
+def compare_srri_values(monitoring_df, permalink_df, output_file=None, outputs=None):
     # Clean column names
     monitoring_df.columns = monitoring_df.columns.str.strip()
     permalink_df.columns = permalink_df.columns.str.strip()
@@ -12,21 +14,24 @@ def compare_srri_values(monitoring_df, permalink_df):
             raise ValueError(f"Missing column in monitoring_df: {col}")
 
     # === Step 2: Merge on Identifier ===
-    merged_df = pd.merge(
-        permalink_df,
-        monitoring_df[["Identifier", "Latest SRRI", "Week_of_Change"]],
-        on="Identifier",
-        how="inner"
-    )
+    with span("merge"):
+        merged_df = pd.merge(
+            permalink_df,
+            monitoring_df[["Identifier", "Latest SRRI", "Week_of_Change"]],
+            on="Identifier",
+            how="inner"
+        )
 
     # Normalize merged_df columns: make sure you use updated names after this
     merged_df.columns = merged_df.columns.str.strip().str.replace(" ", "_")
 
-    print("Merged DF Columns:", merged_df.columns.tolist())
-
     # === Step 3: Compare SRRI values ===
+    # As numbers: the KIID value is a float (e.g. 5.0), the monitoring one the workbook's
+    # string (e.g. "5"). A value that is missing or not a number on either side still counts
+    # as a mismatch
     diff_df = merged_df[
-        merged_df["Risk_Reward_Ranking"] != merged_df["Latest_SRRI"]
+        pd.to_numeric(merged_df["Risk_Reward_Ranking"], errors="coerce")
+        != pd.to_numeric(merged_df["Latest_SRRI"], errors="coerce")
     ]
 
     # === Step 4: Select required columns only ===
@@ -46,8 +51,11 @@ def compare_srri_values(monitoring_df, permalink_df):
         ]
     ]
 
-    # === Step 5: Save to CSV ===
-    output_file = "srri_updates_needed_v2.csv"
-    result_df.to_csv(output_file, index=False)
+    # === Step 5: Save (outputs: a RunOutputs -> mismatches.parquet, output_file: CSV) ===
+    # Nothing is written by default, e.g. for running previews
+    if outputs is not None:
+        outputs.write(MISMATCHES, result_df)
+    if output_file:
+        result_df.to_csv(output_file, index=False)
 
     return result_df
@@ -0,0 +1,371 @@
+import multiprocessing
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+import requests
+
+from logic.extraction_rules import FACTSHEET_RULES, KIID_RULES
+from logic.pdf_fetcher import DEFAULT_MAX_WORKERS, DEFAULT_TIMEOUT, build_session, fetch_document
+from logic.pdf_text import parse_pdf
+from logic.single_flight import SingleFlight
+from logic.tracing import NOOP_SPAN, current_span, span
+
+# Bump when an extractor's parsing logic changes so its cached results are re-computed
+KIID_EXTRACTOR_VERSION = 4
+FACTSHEET_EXTRACTOR_VERSION = 4
+
+# How many pages of each document type are read at most. The SRRI scale, "Ongoing charges"
+# and "Share Class Inception" all sit on the first page or two
+DEFAULT_PAGE_LIMITS = {"kiid": 3, "factsheet": 3}
+
+DOCUMENT_TYPES = {
+    "kiid": {"rules": KIID_RULES, "version": KIID_EXTRACTOR_VERSION, "label": "SRRI or Fee"},
+    "factsheet": {"rules": FACTSHEET_RULES, "version": FACTSHEET_EXTRACTOR_VERSION, "label": "inception date"},
+}
+
+DEFAULT_PARSE_WORKERS = os.cpu_count() or 1
+
+# Start method of every process pool. Pools are created from job / I/O threads while other
+# threads hold requests, SQLite and cache locks, and forking such a process can deadlock the
+# child; a fork server (spawn where there is none) starts workers from a clean process
+PROCESS_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+if PROCESS_CONTEXT.get_start_method() == "forkserver":
+    # The fork server imports the parsers once; every later pool's workers fork from it ready
+    # to parse instead of importing PyMuPDF / pdfplumber again
+    PROCESS_CONTEXT.set_forkserver_preload(["logic.extraction_pipeline"])
+
+# Documents being fetched/parsed right now, across every run in this process
+DOCUMENT_FLIGHTS = SingleFlight()
+
+
+def empty_fields(kind):
+    return dict.fromkeys(DOCUMENT_TYPES[kind]["rules"].fields)
+
+
+def is_document_url(url):
+    # Skip rows where the URL is missing (NaN after the Fact Sheet merge) or not a proper link
+    return isinstance(url, str) and url.startswith("http")
+
+
+# === CPU stage: runs in worker processes, receives a file path rather than the PDF bytes ===
+def parse_document(kind, source, max_pages=None):
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            source = f.read()
+    rules = DOCUMENT_TYPES[kind]["rules"]
+    parsed = parse_pdf(source, max_pages=max_pages, is_complete=rules.is_complete)
+    start = time.perf_counter()
+    matched = {}  # field -> priority of the rule that found it
+    fields = rules.extract(parsed.text, matched)
+    # Only the extracted fields, timings and matched rules travel back to the parent process
+    return fields, parsed._replace(text=""), time.perf_counter() - start, matched
+
+
+def _record_parse(document, metrics, kind, parsed, extract_seconds, matched):
+    # Parse + field extraction timings (measured wherever parse_document ran) as spans and metrics
+    document.record("parse", parsed.parse_seconds, backend=parsed.backend, pages=parsed.pages_read)
+    document.record("extract", extract_seconds)
+    if metrics is None:
+        return
+    metrics.inc("srri_parses_total", kind=kind, backend=parsed.backend, fallback=parsed.fallback or "none")
+    metrics.observe("srri_parse_seconds", parsed.parse_seconds, kind=kind, backend=parsed.backend)
+    metrics.observe("srri_extract_seconds", extract_seconds, kind=kind)
+    for field, priority in matched.items():
+        metrics.inc("srri_fields_total", field=field, rule=priority)
+
+
+def _record_done(metrics, kind, fields, ok, started):
+    # A document this run worked on is finished (extracted, reused or failed)
+    if metrics is None:
+        return
+    metrics.inc("srri_documents_total", kind=kind, outcome="ok" if ok else "failed")
+    metrics.observe("srri_document_seconds", time.perf_counter() - started, kind=kind)
+    for field, value in fields.items():
+        if value is None:
+            metrics.inc("srri_fields_missing_total", kind=kind, field=field)
+
+
+def _fetch_status(error):
+    # Metrics label for a failed fetch
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return f"http_{error.response.status_code}"
+    if isinstance(error, requests.Timeout):
+        return "timeout"
+    if isinstance(error, requests.ConnectionError):
+        return "connection_error"
+    return "error"
+
+
+def _fetch(url, session, timeout, cache, metrics=None, kind=None):
+    start = time.perf_counter()
+    with span("download") as download:
+        try:
+            fetched = fetch_document(url, session=session, timeout=timeout, cache=cache)
+        except Exception as e:
+            if metrics is not None:
+                metrics.inc("srri_fetches_total", kind=kind, status=_fetch_status(e))
+            raise
+        download.set(status=fetched.status, bytes=len(fetched.content))
+    if metrics is not None:
+        metrics.inc("srri_fetches_total", kind=kind, status=fetched.status)
+        metrics.inc("srri_fetch_bytes_total", len(fetched.content), kind=kind, status=fetched.status)
+        metrics.observe("srri_fetch_seconds", time.perf_counter() - start, kind=kind)
+    return fetched
+
+
+def _extract_document(kind, url, session, timeout, cache, store, parse_stats, max_pages, metrics=None):
+    doc_type = DOCUMENT_TYPES[kind]
+    fetched = _fetch(url, session, timeout, cache, metrics, kind)
+    if store is not None:
+        # Same PDF bytes as a document parsed before: reuse its stored extraction
+        stored = store.get(fetched.sha256, kind, doc_type["version"])
+        if stored is not None:
+            current_span().set(reused=True)
+            if metrics is not None:
+                metrics.inc("srri_extractions_reused_total", kind=kind)
+            return stored
+
+    fields, parsed, extract_seconds, matched = parse_document(kind, fetched.content, max_pages)
+    _record_parse(current_span(), metrics, kind, parsed, extract_seconds, matched)
+    if parse_stats is not None:
+        parse_stats.record(url, parsed)
+    if store is not None:
+        store.put(fetched.sha256, kind, doc_type["version"], fields)
+    return fields
+
+
+def extract_document(kind, url, session=None, timeout=DEFAULT_TIMEOUT, cache=None, store=None,
+                     parse_stats=None, max_pages=None, flights=DOCUMENT_FLIGHTS, metrics=None):
+    # Fetch and parse one document inline in the calling thread. If another caller is already
+    # working on the same document, wait for and share its result instead.
+    # metrics (a MetricsRegistry) counts fetches, parser fallbacks, matched rules and missing fields
+    if max_pages is None:
+        max_pages = DEFAULT_PAGE_LIMITS[kind]
+    if not is_document_url(url):
+        return empty_fields(kind)
+
+    def extract():
+        started = time.perf_counter()
+        with span("document", kind=kind, url=url) as document:
+            try:
+                fields = _extract_document(kind, url, session, timeout, cache, store, parse_stats, max_pages, metrics)
+                _record_done(metrics, kind, fields, True, started)
+                return fields, True
+            except Exception as e:
+                print(f"❌ Failed to extract {DOCUMENT_TYPES[kind]['label']} for {url}: {e}")
+                document.set(error=type(e).__name__)
+                _record_done(metrics, kind, empty_fields(kind), False, started)
+                return empty_fields(kind), False
+
+    if flights is None:
+        return extract()[0]
+    return flights.do((kind, url, max_pages), extract)[0]
+
+
+def iter_extraction_pipeline(jobs, max_workers=DEFAULT_MAX_WORKERS, parse_workers=DEFAULT_PARSE_WORKERS,
+                             timeout=DEFAULT_TIMEOUT, session=None, cache=None, store=None, parse_stats=None,
+                             page_limits=None, max_pending=None, checkpoint=None, flights=DOCUMENT_FLIGHTS,
+                             parent_span=None, metrics=None):
+    # jobs: list of (kind, url). Yields (job_index, fields) as each document finishes, in
+    # completion order. Documents already in `checkpoint` (a RunCheckpoint) are yielded
+    # straight away; every other successful result is appended to it as it completes.
+    #
+    # Stage 1 - max_workers I/O threads download each PDF (or serve it from the caches) and,
+    #           once one of max_pending parse slots is free, spool the bytes to a temp file.
+    # Stage 2 - parse_workers processes parse the spooled files. Only the file path crosses
+    #           the process boundary, and at most max_pending files are spooled or being
+    #           parsed, so a fetch thread blocks instead of piling PDFs up in memory or on disk.
+    # parse_workers <= 1 parses inline in the I/O threads (no process pool).
+    #
+    # Each document is one flight in `flights` (a SingleFlight, shared process-wide by
+    # default): duplicate URLs within this run, and URLs another run is already working on,
+    # wait for that one download + parse instead of repeating it.
+    # When tracing, each document this run works on is a "document" span (with download,
+    # parse and extract children) under parent_span, by default the caller's current span.
+    # metrics (a MetricsRegistry) receives fetch, parse, rule and outcome counts as they happen
+    page_limits = {**DEFAULT_PAGE_LIMITS, **(page_limits or {})}
+    max_workers = max(1, max_workers)
+    if parse_workers is None or parse_workers <= 1:
+        parse_workers = 0
+    if max_pending is None:
+        max_pending = 2 * max(parse_workers, 1)
+    if flights is None:
+        flights = SingleFlight()
+    if parent_span is None:
+        parent_span = current_span()
+
+    done = queue.Queue()
+    slots = threading.BoundedSemaphore(max_pending)
+    spool_dir = tempfile.mkdtemp(prefix="srri_pdfs_") if parse_workers else None
+    led = {}  # key -> flight, for the documents this run is doing itself
+    documents = {}  # key -> "document" span of those
+    started = {}  # key -> perf_counter() when this run started on it
+    own_session = session is None
+    if own_session:
+        session = build_session(max_workers)
+
+    def complete(index, key, fields, ok):
+        documents.pop(key, NOOP_SPAN).end(ok=ok)
+        _record_done(metrics, key[0], fields, ok, started.pop(key))
+        done.put((index, fields, ok))
+        flights.resolve(key, led[key], (fields, ok))
+
+    def fail(index, key, kind, url, error):
+        print(f"❌ Failed to extract {DOCUMENT_TYPES[kind]['label']} for {url}: {error}")
+        documents.get(key, NOOP_SPAN).set(error=type(error).__name__)
+        complete(index, key, empty_fields(kind), False)
+
+    def spool(index, fetched):
+        path = os.path.join(spool_dir, f"{index}.pdf")
+        if cache is not None:
+            try:
+                # Hard link to the cached blob: no copy, and survives LRU eviction meanwhile
+                os.link(cache.blob_path(fetched.sha256), path)
+                return path
+            except OSError:
+                pass
+        with open(path, "wb") as f:
+            f.write(fetched.content)
+        return path
+
+    def finish_parse(index, key, kind, url, sha256, path, future):
+        # Runs as the parse future's done-callback: free the slot first, then record the result
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        slots.release()
+        if future.cancelled():
+            # This run is shutting down early; whoever else waits on the document takes over
+            flights.resolve(key, led[key], error=CancelledError())
+            return
+        try:
+            fields, parsed, extract_seconds, matched = future.result()
+            _record_parse(documents.get(key, NOOP_SPAN), metrics, kind, parsed, extract_seconds, matched)
+            if parse_stats is not None:
+                parse_stats.record(url, parsed)
+            if store is not None:
+                store.put(sha256, kind, DOCUMENT_TYPES[kind]["version"], fields)
+            complete(index, key, fields, True)
+        except Exception as e:
+            fail(index, key, kind, url, e)
+
+    def inline_stage(index, key, kind, url):
+        try:
+            with documents.get(key, NOOP_SPAN).activate():
+                fields = _extract_document(
+                    kind, url, session, timeout, cache, store, parse_stats, page_limits[kind], metrics
+                )
+            complete(index, key, fields, True)
+        except Exception as e:
+            fail(index, key, kind, url, e)
+
+    def fetch_stage(index, key, kind, url):
+        try:
+            document = documents.get(key, NOOP_SPAN)
+            with document.activate():
+                fetched = _fetch(url, session, timeout, cache, metrics, kind)
+            if store is not None:
+                stored = store.get(fetched.sha256, kind, DOCUMENT_TYPES[kind]["version"])
+                if stored is not None:
+                    document.set(reused=True)
+                    if metrics is not None:
+                        metrics.inc("srri_extractions_reused_total", kind=kind)
+                    complete(index, key, stored, True)
+                    return
+            # Wait for a parse slot before spooling, so at most max_pending PDFs are on disk
+            slots.acquire()
+            try:
+                path = spool(index, fetched)
+                future = parse_pool.submit(parse_document, kind, path, page_limits[kind])
+            except BaseException:
+                slots.release()
+                raise
+            future.add_done_callback(partial(finish_parse, index, key, kind, url, fetched.sha256, path))
+        except Exception as e:
+            fail(index, key, kind, url, e)
+
+    def fail_followed(index, kind, url, error):
+        print(f"❌ Failed to extract {DOCUMENT_TYPES[kind]['label']} for {url}: {error}")
+        done.put((index, empty_fields(kind), False))
+
+    def follow(index, kind, url, flight):
+        # Done-callback on a flight led elsewhere (an earlier duplicate, or another run)
+        try:
+            fields, ok = flight.result()
+        except BaseException:
+            # The run leading it stopped before finishing it (cancelled, or a blocking
+            # extract_document leader interrupted, e.g. by KeyboardInterrupt): do it in this
+            # run instead. Whatever happens, the document must reach `done`, or the run waits
+            # for it forever
+            try:
+                start(index, kind, url)
+            except RuntimeError:
+                pass  # this run has shut down as well
+            except BaseException as e:
+                fail_followed(index, kind, url, e)
+            return
+        if metrics is not None:
+            metrics.inc("srri_documents_total", kind=kind, outcome="shared")
+        done.put((index, fields, ok))
+
+    def start(index, kind, url):
+        key = (kind, url, page_limits[kind])
+        flight, leader = flights.claim(key)
+        if not leader:
+            flight.add_done_callback(partial(follow, index, kind, url))
+            return
+        led[key] = flight
+        started[key] = time.perf_counter()
+        documents[key] = parent_span.child("document", kind=kind, url=url)
+        try:
+            io_pool.submit(stage, index, key, kind, url)
+        except BaseException:
+            flights.resolve(key, flight, error=CancelledError())
+            raise
+
+    io_pool = ThreadPoolExecutor(max_workers=max_workers)
+    parse_pool = ProcessPoolExecutor(max_workers=parse_workers, mp_context=PROCESS_CONTEXT) if parse_workers else None
+    stage = fetch_stage if parse_workers else inline_stage
+    completed = 0
+    try:
+        for index, (kind, url) in enumerate(jobs):
+            fields = checkpoint.get(kind, url) if checkpoint is not None else None
+            if fields is not None:
+                if metrics is not None:
+                    metrics.inc("srri_documents_total", kind=kind, outcome="resumed")
+                done.put((index, fields, False))
+            elif not is_document_url(url):
+                done.put((index, empty_fields(kind), True))
+            else:
+                start(index, kind, url)
+        while completed < len(jobs):
+            index, fields, ok = done.get()
+            if ok and checkpoint is not None:
+                # Failed documents are left out, so a resumed run tries them again
+                checkpoint.record(*jobs[index], fields)
+            completed += 1
+            yield index, fields
+    finally:
+        # If the consumer stopped early, drop the documents nobody has started on yet
+        abandoned = completed < len(jobs)
+        io_pool.shutdown(wait=True, cancel_futures=abandoned)
+        if parse_pool is not None:
+            parse_pool.shutdown(wait=True, cancel_futures=abandoned)
+        # Anything this run led but never finished: let other runs waiting on it take over
+        for key, flight in list(led.items()):
+            flights.resolve(key, flight, error=CancelledError())
+        for document in list(documents.values()):
+            document.end(cancelled=True)
+        if spool_dir is not None:
+            shutil.rmtree(spool_dir, ignore_errors=True)
+        if own_session:
+            session.close()
@@ -0,0 +1,113 @@
+import re
+from collections import namedtuple
+
+import pandas as pd
+
+# === Anchor phrases ===
+# The document text is lower-cased once and every anchor is located with a plain substring
+# search; rules then only look at a bounded window after the anchors they care about,
+# instead of running their own unbounded `.*?` search across the whole document.
+ANCHORS = {
+    "risk_and_reward": "risk and reward",
+    "risk_profile": "risk profile",
+    "lowest_category": "the lowest category does not mean that the investment is risk free",
+    "category": "category",
+    "ongoing_charges": "ongoing charges",
+    "inception": "share class inception",
+}
+
+# field     -> output column the value is written to
+# priority  -> lower runs first; the first rule that yields a value wins for its field
+# anchors   -> anchor names whose occurrences the rule is tried at, in document order
+# context   -> pattern that must match right at the anchor; its group 1 is the value if value is None
+# value     -> pattern searched in the `window` characters after the context (or after the
+#              anchor when there is no context); group 1 if it has one, else the whole match
+# convert   -> turns the matched string into the stored value
+Rule = namedtuple("Rule", ["field", "priority", "anchors", "context", "value", "window", "convert"])
+
+
+def _to_date(value):
+    date_obj = pd.to_datetime(value, dayfirst=True, errors="coerce")
+    return date_obj.strftime("%Y-%m-%d") if pd.notnull(date_obj) else None
+
+
+SRRI_SCALE = r"risk and reward profile\s*1\s*2\s*3\s*4\s*5\s*6\s*7"
+
+RULES = [
+    # --- SRRI: the value printed after the 1..7 scale, then progressively looser fallbacks ---
+    Rule("Risk_Reward_Ranking", 1, ("risk_and_reward",), SRRI_SCALE, r"\b\d(?:\.\d)?\b", 300, float),
+    Rule("Risk_Reward_Ranking", 2, ("lowest_category",), None, r"(\d)", 200, int),
+    Rule("Risk_Reward_Ranking", 3, ("risk_and_reward",), r"risk and reward profile",
+         r"1\s*2\s*3\s*4\s*5\s*6\s*7\D*(\d)", 600, int),
+    Rule("Risk_Reward_Ranking", 4, ("category",), r"category\s+(\d)\s+reflects", None, 0, int),
+    Rule("Risk_Reward_Ranking", 5, ("risk_profile", "risk_and_reward"), None, r"[1-7]", 300, int),
+
+    # --- Ongoing charges (reported as Management_Fee) ---
+    Rule("Management_Fee", 1, ("ongoing_charges",),
+         r"ongoing charges[^%]{0,100}?(\d{1,2}(?:\.\d{1,2})?)\s?%", None, 0, float),
+
+    # --- Share class inception date, e.g. "09.05.2017" or "01 January 2020" ---
+    Rule("Share_Class_Inception", 1, ("inception",),
+         r"share class inception\s*[:\-]?\s*([0-9]{1,2}[./ -][0-9]{1,2}[./ -][0-9]{2,4}|[0-9]{1,2} [a-z]{3,9} \d{4})",
+         None, 0, _to_date),
+]
+
+
+class RuleSet:
+    # Precompiled set of rules for one document type
+
+    def __init__(self, rules):
+        self.rules = sorted(rules, key=lambda rule: (rule.field, rule.priority))
+        self.fields = list(dict.fromkeys(rule.field for rule in self.rules))
+        self.anchor_names = list(dict.fromkeys(name for rule in self.rules for name in rule.anchors))
+        # Patterns are written in lower case and run against the lower-cased text
+        self._compiled = [
+            (rule, re.compile(rule.context) if rule.context else None, re.compile(rule.value) if rule.value else None)
+            for rule in self.rules
+        ]
+
+    def find_anchors(self, text):
+        # text must already be lower-cased; returns anchor name -> [(start, end), ...]
+        positions = {}
+        for name in self.anchor_names:
+            phrase = ANCHORS[name]
+            start = text.find(phrase)
+            while start != -1:
+                positions.setdefault(name, []).append((start, start + len(phrase)))
+                start = text.find(phrase, start + 1)
+        return positions
+
+    def _apply(self, rule, context, value, text, spans):
+        for start, end in spans:
+            if context is not None:
+                context_match = context.match(text, start)
+                if context_match is None:
+                    continue
+                if value is None:
+                    return rule.convert(context_match.group(1))
+                end = context_match.end()
+            value_match = value.search(text, end, end + rule.window)
+            if value_match is not None:
+                return rule.convert(value_match.group(1) if value.groups else value_match.group())
+        return None
+
+    def extract(self, text, matched=None):
+        # matched, when given, receives field -> priority of the rule that found it
+        text = text.lower()
+        positions = self.find_anchors(text)
+        results = dict.fromkeys(self.fields)
+        for rule, context, value in self._compiled:
+            if results[rule.field] is not None:
+                continue
+            spans = sorted(span for name in rule.anchors for span in positions.get(name, ()))
+            results[rule.field] = self._apply(rule, context, value, text, spans)
+            if matched is not None and results[rule.field] is not None:
+                matched[rule.field] = rule.priority
+        return results
+
+    def is_complete(self, text):
+        return None not in self.extract(text).values()
+
+
+KIID_RULES = RuleSet([rule for rule in RULES if rule.field in ("Risk_Reward_Ranking", "Management_Fee")])
+FACTSHEET_RULES = RuleSet([rule for rule in RULES if rule.field == "Share_Class_Inception"])
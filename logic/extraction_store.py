@@ -0,0 +1,58 @@
+import json
+import os
+import time
+from logic.pdf_cache import DEFAULT_CACHE_DIR
+from logic.sqlite_store import SqliteStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS extractions (
+    sha256 TEXT NOT NULL,
+    extractor TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    fields TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (sha256, extractor, version)
+);
+"""
+
+
+class ExtractionStore(SqliteStore):
+    # Persistent (document sha256, extractor, version) -> extracted fields. Identical PDF bytes
+    # skip parsing entirely; bumping an extractor's version makes only that extractor miss.
+    # versions (extractor -> current version) drops the rows of older versions on open
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, versions=None):
+        os.makedirs(cache_dir, exist_ok=True)
+        self._stats = {"hits": 0, "misses": 0}
+        super().__init__(os.path.join(cache_dir, "extractions.sqlite3"), _SCHEMA)
+        self.pruned = sum(self.prune(extractor, version) for extractor, version in (versions or {}).items())
+
+    def get(self, sha256, extractor, version):
+        row = self._connect().execute(
+            "SELECT fields FROM extractions WHERE sha256 = ? AND extractor = ? AND version = ?",
+            (sha256, extractor, version)
+        ).fetchone()
+        with self._lock:
+            self._stats["hits" if row else "misses"] += 1
+        return json.loads(row[0]) if row else None
+
+    def put(self, sha256, extractor, version, fields):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO extractions (sha256, extractor, version, fields, stored_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (sha256, extractor, version, json.dumps(fields), time.time())
+            )
+
+    def prune(self, extractor, current_version):
+        # Drop rows written by older versions of one extractor; other extractors are untouched
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM extractions WHERE extractor = ? AND version != ?", (extractor, current_version)
+            ).rowcount
+
+    def format_stats(self):
+        with self._lock:
+            hits, misses = self._stats["hits"], self._stats["misses"]
+        pruned = f", {self.pruned} outdated extractions removed" if self.pruned else ""
+        return f"🧾 Extraction cache: {hits} documents reused / {misses} parsed{pruned}"
@@ -0,0 +1,73 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Share class names repeat across weeks, files and runs: remember every (name, currency)
+# already normalized, up to this many entries
+MEMO_MAX_ENTRIES = 100_000
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def _normalize_unique(names, currencies):
+    # Vectorized normalization of distinct (name, currency) pairs
+    name = (
+        names.str.lower()
+        .str.replace(r"[®¬Æ]", "", regex=True)
+        .str.replace("class ", "", regex=False)
+        .str.replace("accu", "acc", regex=False)
+    )
+    hedged = (name.str.extract(r"([a-z]{3})\s*\(hedged\)", expand=False) + "hedged").fillna("")
+    name = name.str.replace(r"[^a-z]", "", regex=True)
+    if currencies is not None:
+        # Move the currency from wherever it appears in the name to the end
+        currency = currencies.fillna("").str.lower()
+        name = pd.Series(
+            [n.replace(c, "") + c if isinstance(n, str) else n for n, c in zip(name, currency)],
+            index=name.index, dtype=object
+        )
+    return (name + hedged).where(names.notna(), "")
+
+
+def normalize_identifiers(share_classes, currencies=None):
+    # Share class names (plus currencies on the monitoring side) -> matching identifiers, e.g.
+    # "First Trust ... Class A USD ACCU" -> "firsttrustaaccusd"
+    # - lower case, without ®/¬/Æ, "class " and with "accu" shortened to "acc"
+    # - only a-z kept; with a currency it is moved to the end of the identifier
+    # - "<ccy> (Hedged)" share classes get a "<ccy>hedged" suffix
+    # Each distinct pair is normalized once; pairs seen before come from the memo table
+    share_classes = pd.Series(share_classes, dtype=object)
+    name_codes, name_values = pd.factorize(share_classes)
+    if currencies is None:
+        currency_codes, currency_values = np.full(len(share_classes), -1), []
+    else:
+        currency_codes, currency_values = pd.factorize(pd.Series(currencies, dtype=object))
+
+    # One code per distinct (name, currency) pair; -1 (missing) shifts to 0
+    width = len(currency_values) + 1
+    pair_codes, rows_to_pair = np.unique((name_codes + 1) * width + (currency_codes + 1), return_inverse=True)
+    keys = [
+        (name_values[code // width - 1] if code // width else None,
+         currency_values[code % width - 1] if code % width else None)
+        for code in pair_codes
+    ]
+
+    with _memo_lock:
+        known = {key: _memo[key] for key in keys if key in _memo}
+    missing = [key for key in keys if key not in known]
+    if missing:
+        names = pd.Series([name for name, _ in missing], dtype=object)
+        missing_currencies = (
+            pd.Series([currency for _, currency in missing], dtype=object) if currencies is not None else None
+        )
+        computed = dict(zip(missing, _normalize_unique(names, missing_currencies)))
+        known.update(computed)
+        with _memo_lock:
+            if len(_memo) + len(computed) > MEMO_MAX_ENTRIES:
+                _memo.clear()
+            _memo.update(computed)
+
+    identifiers = np.array([known[key] for key in keys], dtype=object)
+    return pd.Series(identifiers[rows_to_pair.ravel()], index=share_classes.index)
@@ -0,0 +1,152 @@
+import hashlib
+import threading
+import time
+import traceback
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+DEFAULT_MAX_JOBS = 2  # jobs running at the same time; each one already fans out internally
+DEFAULT_KEEP_FINISHED = 16  # finished jobs kept around so sessions can re-attach to them
+
+JobSnapshot = namedtuple(
+    "JobSnapshot",
+    ["id", "status", "stage", "done", "total", "partial", "context", "result", "error", "elapsed"]
+)
+
+
+def job_id_for(*digests, params=None):
+    # Same inputs and parameters -> same job ID, so a resubmission re-attaches instead of re-running
+    h = hashlib.sha256()
+    for digest in digests:
+        h.update(digest.encode())
+        h.update(b"\0")
+    for name, value in sorted((params or {}).items()):
+        h.update(f"{name}={value!r}\0".encode())
+    return h.hexdigest()[:16]
+
+
+class Job:
+    # State of one background run. The worker thread reports progress and partial results
+    # through the methods below; readers only ever see a consistent copy via snapshot()
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = QUEUED
+        self.stage = "Queued"
+        self.done = 0
+        self.total = 0
+        self.partial = {}  # key -> partial result, filled in as items complete
+        self.context = {}  # values set once per run (e.g. the parsed inputs)
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def expired(self, max_age):
+        # A job that finished more than max_age seconds ago (None: never expires)
+        with self._lock:
+            return max_age is not None and self.finished_at is not None and time.time() - self.finished_at > max_age
+
+    def set_stage(self, stage, total=None):
+        with self._lock:
+            self.stage = stage
+            if total is not None:
+                self.total = total
+                self.done = 0
+
+    def set_context(self, **values):
+        with self._lock:
+            self.context.update(values)
+
+    def record(self, key, value):
+        with self._lock:
+            self.partial[key] = value
+            self.done += 1
+
+    def snapshot(self):
+        with self._lock:
+            end = self.finished_at or time.time()
+            return JobSnapshot(
+                self.id, self.status, self.stage, self.done, self.total, dict(self.partial),
+                dict(self.context), self.result, self.error, end - (self.started_at or end)
+            )
+
+
+class JobRunner:
+    # Runs jobs on a small thread pool, independent of whichever script run or session
+    # submitted them. Jobs are looked up by ID, so any session can poll or re-attach to them
+
+    def __init__(self, max_workers=DEFAULT_MAX_JOBS, keep_finished=DEFAULT_KEEP_FINISHED):
+        self.keep_finished = keep_finished
+        self._jobs = OrderedDict()  # job_id -> Job
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="srri-job")
+
+    def submit(self, job_id, target, *args, max_age=None, **kwargs):
+        # Starts target(job, *args, **kwargs) under job_id unless that job is already queued,
+        # running or done, in which case the existing job is returned. Failed and cancelled
+        # jobs, and done jobs that finished more than max_age seconds ago, are started again
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status not in (FAILED, CANCELLED) and not job.expired(max_age):
+                return job
+            job = Job(job_id)
+            self._jobs[job_id] = job
+            self._prune()
+        self._pool.submit(self._run, job, target, args, kwargs)
+        return job
+
+    def get(self, job_id, max_age=None):
+        # None when unknown, or finished more than max_age seconds ago
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return None if job is None or job.expired(max_age) else job
+
+    def discard(self, job_id=None):
+        # Cancel and forget one job (or all of them); returns how many were dropped
+        with self._lock:
+            doomed = list(self._jobs) if job_id is None else [job_id] if job_id in self._jobs else []
+            for key in doomed:
+                self._jobs.pop(key).cancel()
+        return len(doomed)
+
+    def _prune(self):
+        finished = [key for key, job in self._jobs.items() if job.status in FINISHED]
+        for key in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[key]
+
+    def _run(self, job, target, args, kwargs):
+        with job._lock:
+            job.status = RUNNING
+            job.started_at = time.time()
+        try:
+            result = target(job, *args, **kwargs)
+            status, error = (CANCELLED if job.cancelled else DONE), None
+        except Exception as e:
+            traceback.print_exc()
+            result, status, error = None, FAILED, f"{type(e).__name__}: {e}"
+        with job._lock:
+            job.result = result
+            job.status = status
+            job.error = error
+            if status != FAILED:
+                # A failed job keeps the stage it failed in, so the error can name it
+                job.stage = "Finished" if status == DONE else "Cancelled"
+            job.finished_at = time.time()
@@ -0,0 +1,195 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implied
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Extraction metrics fed by logic/extraction_pipeline.py. Labels:
+#   kind   -> "kiid" / "factsheet"
+#   status -> how a document was fetched: cached, not_modified, downloaded, or why it failed
+#             (http_<code>, timeout, connection_error, error)
+#   rule   -> priority of the extraction rule that found the field (see extraction_rules.RULES)
+HELP = {
+    "srri_documents_total": "Documents finished, by outcome (ok, failed, resumed from a checkpoint, "
+                            "shared with another run working on the same document)",
+    "srri_extractions_reused_total": "Documents whose fields came from the extraction store (same PDF bytes)",
+    "srri_fetches_total": "Document fetches, by status",
+    "srri_fetch_bytes_total": "PDF bytes fetched, by status (downloaded = transferred over the network)",
+    "srri_fetch_seconds": "Time to fetch a document (cache lookup, revalidation or download)",
+    "srri_parses_total": "PDFs parsed, by backend and fallback reason (none, error, no_text)",
+    "srri_parse_seconds": "Time to parse a PDF into text",
+    "srri_extract_seconds": "Time to extract the fields from a parsed PDF's text",
+    "srri_fields_total": "Fields found in parsed documents, by the rule that found them",
+    "srri_fields_missing_total": "Fields left as None in finished documents",
+    "srri_document_seconds": "Time from starting a document to having its fields",
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    # Thread-safe counters and latency histograms for one run, keyed by name + labels.
+    # Snapshots come as Prometheus text (to_prometheus) or JSON (snapshot); a MetricsServer
+    # serves them while the run is in progress. A new run starts a new registry, which a
+    # Prometheus scraper sees as a counter reset
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._counters = {}  # (name, label key) -> value
+        self._histograms = {}  # (name, label key) -> [count per bucket..., +Inf count, sum]
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            position = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            histogram[position] += 1
+            histogram[-1] += value
+
+    def value(self, name, **labels):
+        # Sum of a counter over every label set that includes `labels`
+        wanted = set(_label_key(labels))
+        with self._lock:
+            return sum(value for (counter, key), value in self._counters.items()
+                       if counter == name and wanted <= set(key))
+
+    def snapshot(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(histogram)) for key, histogram in self._histograms.items())
+        return {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "seconds": round(time.time() - self.started_at, 3),
+            "counters": [{"name": name, "labels": dict(key), "value": value} for (name, key), value in counters],
+            "histograms": [
+                {"name": name, "labels": dict(key), "count": sum(histogram[:-1]), "sum": round(histogram[-1], 6),
+                 "buckets": {str(bound): count for bound, count in zip(self.buckets + ("+Inf",), histogram[:-1])}}
+                for (name, key), histogram in histograms
+            ],
+        }
+
+    def to_prometheus(self):
+        # Prometheus text exposition format (version 0.0.4); histogram buckets are cumulative
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(histogram)) for key, histogram in self._histograms.items())
+        lines, described = [], set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, key), value in counters:
+            describe(name, "counter")
+            lines.append(f"{name}{_format_labels(key)} {value}")
+        for (name, key), histogram in histograms:
+            describe(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), histogram[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(key, [('le', str(bound))])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(key)} {histogram[-1]:.6f}")
+            lines.append(f"{name}_count{_format_labels(key)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory):
+        # metrics.prom + metrics.json snapshot in directory (e.g. the run's output directory)
+        prom_path = os.path.join(directory, "metrics.prom")
+        with open(prom_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        with open(os.path.join(directory, "metrics.json"), "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=1)
+        return prom_path
+
+    def format_stats(self):
+        fetched = self.value("srri_fetches_total")
+        if not fetched:
+            return "📈 Metrics: no documents fetched"
+        downloaded_mb = self.value("srri_fetch_bytes_total", status="downloaded") / (1024 * 1024)
+        fallbacks = self.value("srri_parses_total") - self.value("srri_parses_total", fallback="none")
+        return (
+            f"📈 Metrics: {fetched} fetches ({self.value('srri_fetches_total', status='downloaded')} downloaded, "
+            f"{downloaded_mb:.2f} MB), {self.value('srri_documents_total', outcome='failed')} failed "
+            f"({self.value('srri_fetches_total', status='timeout')} timeouts), "
+            f"{fallbacks} parser fallbacks, {self.value('srri_fields_missing_total')} fields missing"
+        )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        registry = self.server.registry
+        if self.path.rstrip("/") in ("", "/metrics"):
+            self._reply(registry.to_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+        elif self.path == "/metrics.json":
+            self._reply(json.dumps(registry.snapshot()), "application/json")
+        else:
+            self.send_error(404)
+
+    def _reply(self, text, content_type):
+        body = text.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class MetricsServer:
+    # Serves a registry over HTTP from a background thread while a run is in progress:
+    # /metrics (Prometheus text) and /metrics.json. port 0 picks any free port
+
+    def __init__(self, registry, port=0, host="127.0.0.1"):
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.registry = registry
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
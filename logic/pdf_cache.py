@@ -0,0 +1,169 @@
+import hashlib
+import os
+import tempfile
+import time
+from logic.sqlite_store import SqliteStore
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "SRRI_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "srri_app")
+)
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GiB of PDFs
+DEFAULT_MAX_AGE = 24 * 60 * 60  # revalidate a URL with the server once its copy is a day old
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    etag TEXT,
+    last_modified TEXT
+);
+CREATE INDEX IF NOT EXISTS blobs_last_access ON blobs (last_access);
+"""
+
+
+class PdfCache(SqliteStore):
+    # On-disk PDF cache: URL -> content hash in a SQLite index, bytes stored once per hash
+    # under objects/<aa>/<sha256>.pdf. Writes are atomic (temp file + rename) and the index
+    # runs in WAL mode, so several threads or processes can share one cache directory.
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.root = os.path.join(cache_dir, "pdfs")
+        self.objects_dir = os.path.join(self.root, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._stats = {
+            "hits": 0, "revalidated": 0, "misses": 0, "bytes_from_cache": 0, "bytes_stored": 0, "evicted": 0
+        }
+        super().__init__(os.path.join(self.root, "index.sqlite3"), _SCHEMA)
+
+    def blob_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256[:2], f"{sha256}.pdf")
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    # === Lookup ===
+    def lookup(self, url):
+        # Returns the stored entry for a URL (hash, fetch time and HTTP validators), or None
+        row = self._connect().execute(
+            "SELECT sha256, fetched_at, etag, last_modified FROM urls WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("sha256", "fetched_at", "etag", "last_modified"), row))
+
+    def is_fresh(self, entry):
+        return self.max_age is not None and time.time() - entry["fetched_at"] <= self.max_age
+
+    def read_blob(self, sha256):
+        try:
+            with open(self.blob_path(sha256), "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            # Evicted by another worker between the index read and the file read
+            return None
+        with self._connect() as conn:
+            conn.execute("UPDATE blobs SET last_access = ? WHERE sha256 = ?", (time.time(), sha256))
+        return content
+
+    def record_hit(self, nbytes, revalidated=False):
+        self._count("revalidated" if revalidated else "hits")
+        self._count("bytes_from_cache", nbytes)
+
+    def record_miss(self):
+        self._count("misses")
+
+    # === Store ===
+    def put(self, url, content, etag=None, last_modified=None):
+        sha256 = hashlib.sha256(content).hexdigest()
+        path = self.blob_path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._count("bytes_stored", len(content))
+
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO blobs (sha256, size, last_access) VALUES (?, ?, ?) "
+                "ON CONFLICT(sha256) DO UPDATE SET last_access = excluded.last_access",
+                (sha256, len(content), now)
+            )
+            conn.execute(
+                "INSERT INTO urls (url, sha256, fetched_at, etag, last_modified) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET sha256 = excluded.sha256, fetched_at = excluded.fetched_at, "
+                "etag = excluded.etag, last_modified = excluded.last_modified",
+                (url, sha256, now, etag, last_modified)
+            )
+        self.evict()
+        return sha256
+
+    def touch(self, url, etag=None, last_modified=None):
+        # A 304 response: the stored copy is still current, restart its freshness window
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE urls SET fetched_at = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (time.time(), etag, last_modified, url)
+            )
+
+    # === LRU eviction down to the byte budget ===
+    def evict(self):
+        if self.max_bytes is None:
+            return
+        conn = self._connect()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        victims = []
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            for sha256, size in conn.execute("SELECT sha256, size FROM blobs ORDER BY last_access").fetchall():
+                if total <= self.max_bytes:
+                    break
+                victims.append(sha256)
+                total -= size
+            conn.executemany("DELETE FROM blobs WHERE sha256 = ?", [(v,) for v in victims])
+            conn.executemany("DELETE FROM urls WHERE sha256 = ?", [(v,) for v in victims])
+
+        for sha256 in victims:
+            try:
+                os.remove(self.blob_path(sha256))
+            except FileNotFoundError:
+                pass
+        self._count("evicted", len(victims))
+
+    # === Run summary ===
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def format_stats(self):
+        stats = self.stats()
+        served = stats["hits"] + stats["revalidated"]
+        lookups = served + stats["misses"]
+        hit_rate = served / lookups * 100 if lookups else 0.0
+        return (
+            f"📦 PDF cache: {stats['hits']} hits + {stats['revalidated']} revalidated (304) / "
+            f"{stats['misses']} downloads ({hit_rate:.0f}% served locally), "
+            f"{stats['bytes_from_cache'] / 1e6:.1f} MB served from cache, "
+            f"{stats['bytes_stored'] / 1e6:.1f} MB stored, {stats['evicted']} evicted"
+        )
@@ -0,0 +1,67 @@
+import hashlib
+from collections import namedtuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT = 15
+DEFAULT_MAX_WORKERS = 8
+
+# status is "cached" (fresh local copy, no request), "not_modified" (server answered 304)
+# or "downloaded" (full body transferred)
+FetchResult = namedtuple("FetchResult", ["content", "sha256", "status"])
+
+
+def build_session(max_workers=DEFAULT_MAX_WORKERS):
+    # One pooled session shared by every KIID / Fact Sheet download, sized so
+    # each worker thread can keep its own keep-alive connection open
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_document(url, session=None, timeout=DEFAULT_TIMEOUT, cache=None):
+    http = session or requests
+    entry = cache.lookup(url) if cache is not None else None
+    headers = {}
+
+    if entry is not None:
+        # === Fresh local copy: no request at all ===
+        if cache.is_fresh(entry):
+            content = cache.read_blob(entry["sha256"])
+            if content is not None:
+                cache.record_hit(len(content))
+                return FetchResult(content, entry["sha256"], "cached")
+
+        # === Stale local copy: ask the server whether it changed ===
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    resp = http.get(url, timeout=timeout, headers=headers)
+    if resp.status_code == 304 and entry is not None:
+        content = cache.read_blob(entry["sha256"])
+        if content is not None:
+            cache.touch(url, etag=resp.headers.get("ETag"), last_modified=resp.headers.get("Last-Modified"))
+            cache.record_hit(len(content), revalidated=True)
+            return FetchResult(content, entry["sha256"], "not_modified")
+        # Stored bytes were evicted in the meantime: fall back to a full download
+        resp = http.get(url, timeout=timeout)
+
+    resp.raise_for_status()
+    content = resp.content
+    if cache is not None:
+        cache.record_miss()
+        sha256 = cache.put(
+            url, content, etag=resp.headers.get("ETag"), last_modified=resp.headers.get("Last-Modified")
+        )
+    else:
+        sha256 = hashlib.sha256(content).hexdigest()
+    return FetchResult(content, sha256, "downloaded")
+
+
+def fetch_pdf(url, session=None, timeout=DEFAULT_TIMEOUT, cache=None):
+    return fetch_document(url, session=session, timeout=timeout, cache=cache).content
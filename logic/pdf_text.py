@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import namedtuple
+from io import BytesIO
+
+import fitz  # PyMuPDF
+import pdfplumber
+
+PYMUPDF = "pymupdf"
+PDFPLUMBER = "pdfplumber"
+
+# fallback is why the fallback backend produced the text: "error" (the first backend raised),
+# "no_text" (it found no text), or None when the first backend's text was used
+ParsedDocument = namedtuple("ParsedDocument", ["text", "backend", "pages_read", "parse_seconds", "fallback"])
+
+
+def _pages_with_pymupdf(pdf_bytes, max_pages):
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        for page_number, page in enumerate(doc):
+            if max_pages is not None and page_number >= max_pages:
+                break
+            yield page.get_text()
+
+
+def _pages_with_pdfplumber(pdf_bytes, max_pages):
+    with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
+        for page in pdf.pages[:max_pages]:
+            yield (page.extract_text() or "") + "\n"
+
+
+_BACKENDS = {PYMUPDF: _pages_with_pymupdf, PDFPLUMBER: _pages_with_pdfplumber}
+
+
+def _read_pages(pages, is_complete):
+    # Render one page at a time and stop as soon as every wanted field has been found
+    text = ""
+    pages_read = 0
+    try:
+        for page_text in pages:
+            text += page_text
+            pages_read += 1
+            if is_complete is not None and is_complete(text):
+                break
+    finally:
+        pages.close()
+    return text, pages_read
+
+
+def parse_pdf(pdf_bytes, backend=PYMUPDF, fallback=PDFPLUMBER, max_pages=None, is_complete=None):
+    # Parse a PDF once with the fast backend; the fallback backend only runs when the first
+    # one raises or finds no text at all (e.g. an unusual encoding PyMuPDF cannot read).
+    # max_pages caps how far into the document we read; is_complete(text_so_far) lets the
+    # caller stop early once its fields are all present
+    start = time.perf_counter()
+    used = backend
+    reason = None
+    try:
+        text, pages_read = _read_pages(_BACKENDS[backend](pdf_bytes, max_pages), is_complete)
+    except Exception:
+        if not fallback:
+            raise
+        text, pages_read = "", 0
+        reason = "error"
+    if not text.strip() and fallback:
+        used = fallback
+        reason = reason or "no_text"
+        text, pages_read = _read_pages(_BACKENDS[fallback](pdf_bytes, max_pages), is_complete)
+    return ParsedDocument(text, used, pages_read, time.perf_counter() - start, reason)
+
+
+class ParseStats:
+    # Thread-safe per-run record of how long each document took to parse and with which backend
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = []  # (source, backend, pages_read, seconds)
+
+    def record(self, source, parsed):
+        with self._lock:
+            self.timings.append((source, parsed.backend, parsed.pages_read, parsed.parse_seconds))
+
+    def format_stats(self):
+        with self._lock:
+            timings = list(self.timings)
+        if not timings:
+            return "⏱️ No PDFs parsed"
+        total = sum(seconds for _, _, _, seconds in timings)
+        pages = sum(pages_read for _, _, pages_read, _ in timings)
+        backends = {}
+        for _, backend, _, _ in timings:
+            backends[backend] = backends.get(backend, 0) + 1
+        slowest = max(timings, key=lambda t: t[3])
+        by_backend = ", ".join(f"{name} {count}" for name, count in sorted(backends.items()))
+        return (
+            f"⏱️ Parsed {len(timings)} PDFs ({pages} pages) in {total:.2f}s "
+            f"(avg {total / len(timings) * 1000:.1f} ms/doc, slowest {slowest[3] * 1000:.0f} ms; {by_backend})"
+        )
@@ -0,0 +1,56 @@
+from logic.permalink_parser import iter_permalink_records
+
+
+class PermalinkIndex:
+    # Parsed permalink export held in memory and keyed by
+    # (ISIN, document type, language, audience) -> positions of the matching rows.
+    # Built once per export; any language/audience combination is then a few dict lookups
+    # instead of a re-parse. Where several rows match, the earliest one in the file wins,
+    # as it did with the line filters.
+
+    def __init__(self, records=()):
+        self._records = []
+        self._by_key = {}  # (isin, document_type, language, audience) -> [position, ...]
+        self._isins = {}  # (document_type, language) -> {isin: None}, in file order
+        for record in records:
+            self.add(record)
+
+    @classmethod
+    def from_source(cls, source, document_types=None):
+        # source: path or upload, as accepted by iter_permalink_records
+        return cls(iter_permalink_records(source, document_types=document_types))
+
+    def add(self, record):
+        position = len(self._records)
+        self._records.append(record)
+        for audience in record.audiences:
+            self._by_key.setdefault((record.isin, record.document_type, record.language, audience), []).append(position)
+        self._isins.setdefault((record.document_type, record.language), {}).setdefault(record.isin)
+
+    def _find(self, isin, document_type, language, audiences, url_suffix):
+        positions = sorted({
+            position
+            for audience in audiences
+            for position in self._by_key.get((isin, document_type, language, audience), ())
+        })
+        for position in positions:
+            record = self._records[position]
+            if url_suffix is None or (record.url and record.url.endswith(url_suffix)):
+                return position, record
+        return None
+
+    def find(self, isin, document_type, language, audiences, url_suffix=None):
+        # First document of this type for the ISIN, in the language, for any of the audiences
+        found = self._find(isin, document_type, language, audiences, url_suffix)
+        return found[1] if found else None
+
+    def select(self, document_type, language, audiences, url_suffix=None):
+        # One document per ISIN (the first matching row of each), in file order
+        found = [
+            self._find(isin, document_type, language, audiences, url_suffix)
+            for isin in self._isins.get((document_type, language), ())
+        ]
+        return [record for _, record in sorted(item for item in found if item is not None)]
+
+    def __len__(self):
+        return len(self._records)
@@ -0,0 +1,128 @@
+import csv
+import io
+import re
+from collections import namedtuple
+
+KIID = "UCITS KIID"
+FACT_SHEET = "Fact Sheet"
+
+ISIN_PATTERN = re.compile(r"\bIE[0-9A-Z]{10}\b")
+
+# One document row of the permalink export:
+# document_type -> "UCITS KIID", "Fact Sheet", "Investor Guide", ...
+# share_class   -> third column, or "third - fourth" when the share class name itself
+#                  contained a comma and spilled into the ISIN column
+# audiences     -> tuple of the audience columns between the ISIN and the URL
+# line          -> the raw row, as the DataFrame "Line" column keeps it
+PermalinkRecord = namedtuple(
+    "PermalinkRecord",
+    ["document_type", "fund_name", "share_class", "isin", "audiences", "url", "language", "line"]
+)
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # bytes read from the file per chunk
+
+
+def _open_text(source, chunk_size):
+    # Path, bytes file-like object (Streamlit UploadedFile, BytesIO) or text file-like object
+    if isinstance(source, str):
+        return open(source, "r", encoding="utf-8-sig", newline="", buffering=chunk_size), True
+    if isinstance(source, io.TextIOBase):
+        return source, False
+    return io.TextIOWrapper(source, encoding="utf-8-sig", newline=""), False
+
+
+def _to_record(fields, line):
+    if len(fields) == 1 and "," in fields[0]:
+        # The whole row was wrapped in one pair of quotes
+        fields = _split(fields[0])
+    if len(fields) < 4:
+        return None
+
+    fields = [field.strip() for field in fields]
+    url_at = next((i for i in range(len(fields) - 1, 1, -1) if fields[i].startswith("http")), None)
+    end = url_at if url_at is not None else len(fields)
+    isin_at = next((i for i in range(2, end) if fields[i][:2] == "IE" and ISIN_PATTERN.fullmatch(fields[i])), None)
+    if isin_at is not None:
+        isin = fields[isin_at]
+    else:
+        isin_match = ISIN_PATTERN.search(line)
+        isin = isin_match.group() if isin_match else None
+
+    third, fourth = fields[2], fields[3]
+    return PermalinkRecord(
+        fields[0],
+        fields[1],
+        third if fourth.startswith("IE") else f"{third} - {fourth}",
+        isin,
+        tuple(field for field in fields[isin_at + 1 if isin_at is not None else 4:end] if field),
+        fields[url_at] if url_at is not None else None,
+        fields[url_at + 1] if url_at is not None and url_at + 1 < len(fields) else None,
+        line,
+    )
+
+
+def _iter_row_lines(lines):
+    # One string per CSV row: a line, joined with the following line(s) while a quoted
+    # field is still open
+    pending = ""
+    for line in lines:
+        if pending:
+            line, pending = pending + line, ""
+        if line.count('"') % 2:
+            pending = line
+            continue
+        yield line
+    if pending:
+        yield pending
+
+
+def _split(line):
+    # Rows without quotes (nearly all of an export) are split directly; the rest go through
+    # the csv module. The export pads rows with empty trailing columns, which are dropped
+    if '"' in line:
+        fields = next(csv.reader([line]))
+        while fields and not fields[-1]:
+            fields.pop()
+        return fields
+    return line.rstrip("\r\n").rstrip(",").split(",")
+
+
+def _contains_any(line, phrases):
+    return phrases is None or any(phrase in line for phrase in phrases)
+
+
+def iter_permalink_records(source, document_types=None, languages=None, audiences=None,
+                           chunk_size=DEFAULT_CHUNK_SIZE):
+    # Single pass over the permalink export, yielding one PermalinkRecord per document row.
+    # The file is read in chunks, one row at a time, so memory stays flat however large the
+    # export is, and quoted fields containing commas are kept together.
+    # document_types / languages / audiences keep only rows of those document types, in one
+    # of those languages, for at least one of those audiences. Rows that cannot match are
+    # skipped on a substring check before they are even split
+    document_types = tuple(document_types) if document_types is not None else None
+    languages = set(languages) if languages is not None else None
+    audiences = set(audiences) if audiences is not None else None
+    text, owned = _open_text(source, chunk_size)
+    try:
+        for row_number, line in enumerate(_iter_row_lines(text)):
+            row_start = line.lstrip('"')
+            if row_number == 0 and row_start.startswith("Document Name"):
+                continue
+            if document_types is not None and not row_start.startswith(document_types):
+                continue
+            if not (_contains_any(line, languages) and _contains_any(line, audiences)):
+                continue
+            record = _to_record(_split(line), line.strip())
+            if record is None:
+                continue
+            if languages is not None and record.language not in languages:
+                continue
+            if audiences is not None and audiences.isdisjoint(record.audiences):
+                continue
+            yield record
+    finally:
+        if owned:
+            text.close()
+        elif text is not source:
+            # Hand the caller's binary file back open instead of closing it with the wrapper
+            text.detach()
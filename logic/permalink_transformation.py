@@ -1,6 +1,7 @@
 import pandas as pd
 import re
 import io
+from logic.identifiers import normalize_identifiers
 
 def process_permalink_file(file):
     # === Step 1: Read the file content ===
@@ -78,28 +79,7 @@ def process_permalink_file(file):
     merged_df = kiid_df.merge(factsheet_df, on="ISIN", how="left")
 
     # === Step 7: Create clean identifier ===
-    def clean_alpha_only(name):
-        if pd.isna(name):
-            return ""
-        name = name.lower()
-
-        name = re.sub(r'[®¬Æ]', '', name)
-        name = name.replace('class ', '')
-        name = name.replace('accu', 'acc')
-
-        hedged_suffix = ''
-        match = re.search(r'([a-z]{3})\s*\(hedged\)', name)
-        if match:
-            hedged_suffix = match.group(1) + 'hedged'
-
-        name = re.sub(r'[^a-z]', '', name)
-
-        if hedged_suffix:
-            name += hedged_suffix
-
-        return name
-
-    merged_df["Identifier"] = merged_df["Share Class"].apply(clean_alpha_only)
+    merged_df["Identifier"] = normalize_identifiers(merged_df["Share Class"])
 
     # === Step 8: Drop duplicates on Identifier ===
     final_df = merged_df.drop_duplicates(subset="Identifier", keep="first")
@@ -4,8 +4,10 @@ import requests
 import pdfplumber
 import fitz  # PyMuPDF
 from io import BytesIO
+from logic.extraction_rules import KIID_RULES
+from logic.identifiers import normalize_identifiers
 
-def process_and_extract_permalink_file(file, output_path="output-monitoring-tsfm.csv"):
+def process_and_extract_permalink_file(file, output_path=None):
     # === Step 1: Read and parse lines from uploaded file ===
     content = file.read().decode('utf-8-sig')
     raw_lines = content.splitlines()
@@ -81,23 +83,7 @@ def process_and_extract_permalink_file(file, output_path="output-monitoring-tsfm
     merged_df = kiid_df.merge(factsheet_df, on="ISIN", how="left")
 
     # === Step 7: Generate clean identifier from Share Class ===
-    def clean_alpha_only(name):
-        if pd.isna(name):
-            return ""
-        name = name.lower()
-        name = re.sub(r'[®¬Æ]', '', name)
-        name = name.replace('class ', '')
-        name = name.replace('accu', 'acc')
-        hedged_suffix = ''
-        match = re.search(r'([a-z]{3})\s*\(hedged\)', name)
-        if match:
-            hedged_suffix = match.group(1) + 'hedged'
-        name = re.sub(r'[^a-z]', '', name)
-        if hedged_suffix:
-            name += hedged_suffix
-        return name
-
-    merged_df["Identifier"] = merged_df["Share Class"].apply(clean_alpha_only)
+    merged_df["Identifier"] = normalize_identifiers(merged_df["Share Class"])
     merged_df = merged_df.drop_duplicates(subset="Identifier", keep="first")
 
     # === Step 8: Extract SRRI and Management Fee ===
@@ -111,37 +97,17 @@ def process_and_extract_permalink_file(file, output_path="output-monitoring-tsfm
             with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
                 text = "\n".join(page.extract_text() or "" for page in pdf.pages)
 
-            marker = r"Risk and Reward Profile\s*1\s*2\s*3\s*4\s*5\s*6\s*7"
-            parts = re.split(marker, text, flags=re.IGNORECASE | re.DOTALL)
-            if len(parts) >= 2:
-                match = re.search(r"\b\d(\.\d)?\b", parts[1])
-                if match:
-                    srri_value = float(match.group())
-
-            fee_match = re.search(r"Ongoing charges[^%]{0,100}?(\d{1,2}(?:\.\d{1,2})?)\s?%", text, re.IGNORECASE)
-            if fee_match:
-                management_fee = float(fee_match.group(1))
+            fields = KIID_RULES.extract(text)
+            srri_value, management_fee = fields["Risk_Reward_Ranking"], fields["Management_Fee"]
 
             if srri_value is None:
                 doc = fitz.open(stream=BytesIO(pdf_bytes), filetype="pdf")
                 full_text = "".join(page.get_text() for page in doc)
 
-                srri_patterns = [
-                    r'The lowest category does not mean that the investment is risk free\D+(\d)',
-                    r'Risk and Reward Profile.*?1\s*2\s*3\s*4\s*5\s*6\s*7.*?(\d)',
-                    r'category\s+(\d)\s+reflects',
-                    r'(?:risk profile|risk and reward).*?([1-7])'
-                ]
-                for pattern in srri_patterns:
-                    match = re.search(pattern, full_text, re.IGNORECASE | re.DOTALL)
-                    if match:
-                        srri_value = int(match.group(1))
-                        break
-
+                fields = KIID_RULES.extract(full_text)
+                srri_value = fields["Risk_Reward_Ranking"]
                 if management_fee is None:
-                    fee_match = re.search(r"Ongoing charges[^%]{0,100}?(\d{1,2}(?:\.\d{1,2})?)\s?%", full_text, re.IGNORECASE)
-                    if fee_match:
-                        management_fee = float(fee_match.group(1))
+                    management_fee = fields["Management_Fee"]
         except Exception as e:
             print(f"❌ Failed for {url}: {e}")
             srri_value = management_fee = None
@@ -155,7 +121,8 @@ def process_and_extract_permalink_file(file, output_path="output-monitoring-tsfm
     extraction_results = merged_df["KIID PDF URL"].apply(extract_srri_and_fee)
     final_df = pd.concat([merged_df, extraction_results], axis=1)
 
-    # === Step 10: Save and return ===
-    final_df.to_csv(output_path, index=False)
-    print(f"✅ Output saved to {output_path}")
+    # === Step 10: Save (when an output_path is given) and return ===
+    if output_path:
+        final_df.to_csv(output_path, index=False)
+        print(f"✅ Output saved to {output_path}")
     return final_df
@@ -1,202 +1,197 @@
 import pandas as pd
-import re
-import requests
-import pdfplumber
-import fitz  # PyMuPDF
-from io import BytesIO
-
-def process_and_extract_permalink_file(file, output_path="output-monitoring-tsfm-v2.csv"):
-    # === Step 1: Handle both Streamlit uploads and local file paths ===
-    if isinstance(file, str):
-        # Called from script: file is a path string
-        with open(file, 'r', encoding='utf-8-sig') as f:
-            content = f.read()
-    else:
-        # Called from Streamlit: file is a file-like object (UploadedFile)
-        content = file.read().decode('utf-8-sig')
-
-    raw_lines = content.splitlines()
-
-    # === Step 2: Filter KIID lines (English + UK + proper KIID URL) ===
-    kiid_lines = [
-        line.strip()
-        for line in raw_lines
-        if (
-            "UCITS KIID" in line and
-            "KIID.pdf" in line and
-            "English" in line and
-            ("UK Professional Investor" in line or "UK Retail Investor" in line)
-        )
-    ]
-
-    # === Step 3: Filter Fact Sheet lines ===
-    factsheet_lines = [
-        line.strip()
-        for line in raw_lines
-        if (
-            "Fact Sheet" in line and
-            "FactSheet.pdf" in line and
-            "English" in line and
-            ("UK Professional Investor" in line or "UK Retail Investor" in line)
-        )
-    ]
-
-    # === Step 4: Extract data from KIID lines ===
-    kiid_data = []
-    for line in kiid_lines:
-        url_match = re.search(r"https?://\S+?KIID\.pdf", line)
-        url = url_match.group() if url_match else None
-
-        isin_match = re.search(r"\bIE[0-9A-Z]{10}\b", line)
-        isin = isin_match.group() if isin_match else None
-
-        fields = line.strip('"').split(',')
-        if len(fields) >= 4:
-            fund_name = fields[1].strip()
-            third = fields[2].strip()
-            fourth = fields[3].strip()
-            share_class = third if fourth.startswith("IE") else f"{third} - {fourth}"
-
-            kiid_data.append({
-                "Line": line,
-                "Fund Name": fund_name,
-                "Share Class": share_class,
-                "ISIN": isin,
-                "KIID PDF URL": url
-            })
-
-    kiid_df = pd.DataFrame(kiid_data)
-
-    # === Step 5: Extract Fact Sheet URLs ===
-    factsheet_data = []
-    for line in factsheet_lines:
-        url_match = re.search(r"https?://\S+?FactSheet\.pdf", line)
-        url = url_match.group() if url_match else None
-
-        isin_match = re.search(r"\bIE[0-9A-Z]{10}\b", line)
-        isin = isin_match.group() if isin_match else None
-
-        if isin:
-            factsheet_data.append({
-                "ISIN": isin,
-                "Fact Sheet URL": url
-            })
-
-    factsheet_df = pd.DataFrame(factsheet_data).drop_duplicates(subset="ISIN")
-
-    # === Step 6: Merge KIID + Fact Sheet ===
-    merged_df = kiid_df.merge(factsheet_df, on="ISIN", how="left")
+from logic.pdf_fetcher import DEFAULT_MAX_WORKERS, DEFAULT_TIMEOUT
+from logic.pdf_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_AGE, DEFAULT_MAX_BYTES, PdfCache
+from logic.extraction_store import ExtractionStore
+from logic.identifiers import normalize_identifiers
+from logic.metrics import MetricsRegistry
+from logic.pdf_text import ParseStats
+from logic.permalink_index import PermalinkIndex
+from logic.permalink_parser import FACT_SHEET, KIID
+from logic.run_checkpoint import DEFAULT_CHECKPOINT_MAX_AGE, RunCheckpoint, run_id_for
+from logic.run_outputs import PERMALINK
+from logic.tracing import span, start_span
+from logic.extraction_pipeline import (
+    DEFAULT_PAGE_LIMITS, DEFAULT_PARSE_WORKERS, FACTSHEET_EXTRACTOR_VERSION, KIID_EXTRACTOR_VERSION,
+    extract_document, iter_extraction_pipeline
+)
+
+# === Extract SRRI and Management Fee from a single KIID PDF ===
+def extract_srri_and_fee(url, session=None, timeout=DEFAULT_TIMEOUT, cache=None, store=None, parse_stats=None,
+                         max_pages=DEFAULT_PAGE_LIMITS["kiid"], metrics=None):
+    fields = extract_document("kiid", url, session, timeout, cache, store, parse_stats, max_pages, metrics=metrics)
+    return pd.Series({
+        "Risk_Reward_Ranking": fields["Risk_Reward_Ranking"],
+        "Management_Fee": fields["Management_Fee"]
+    })
+
+
+# === Extract Share Class Inception Date from a single Fact Sheet PDF ===
+def extract_inception_date(factsheet_url, session=None, timeout=DEFAULT_TIMEOUT, cache=None, store=None,
+                           parse_stats=None, max_pages=DEFAULT_PAGE_LIMITS["factsheet"], metrics=None):
+    return extract_document(
+        "factsheet", factsheet_url, session, timeout, cache, store, parse_stats, max_pages, metrics=metrics
+    )["Share_Class_Inception"]
+
+
+EXTRACTED_COLUMNS = ["Risk_Reward_Ranking", "Management_Fee", "Share_Class_Inception"]
+
+UK_AUDIENCES = {"UK Professional Investor", "UK Retail Investor"}
+
+
+def build_permalink_index(file):
+    # Steps 1-3: stream the export (Streamlit upload or local path) into an index of its
+    # KIID and Fact Sheet rows; build it once per export and reuse it across queries
+    with span("permalink_index") as build:
+        index = PermalinkIndex.from_source(file, document_types=(KIID, FACT_SHEET))
+        build.set(records=len(index))
+    return index
+
+
+def load_permalink_documents(file=None, language="English", audiences=UK_AUDIENCES, index=None, identifiers=None):
+    # Steps 1-7: one row per share class with its KIID and Fact Sheet URLs for the given
+    # language and audiences, before anything is downloaded. Pass a prebuilt `index` to
+    # query another language/audience without parsing the export again.
+    # identifiers: keep only share classes whose Identifier is in this collection (e.g. the
+    # monitoring summary's), so no documents are fetched for rows the comparison would drop.
+    # None keeps every share class (full scan)
+    if index is None:
+        index = build_permalink_index(file)
+
+    # === Step 4: KIID per ISIN ===
+    kiids = index.select(KIID, language, audiences, url_suffix="KIID.pdf")
+
+    # === Steps 5-6: Matching Fact Sheet per ISIN ===
+    rows = []
+    for record in kiids:
+        factsheet = index.find(record.isin, FACT_SHEET, language, audiences, url_suffix="FactSheet.pdf")
+        rows.append({
+            "Line": record.line,
+            "Fund Name": record.fund_name,
+            "Share Class": record.share_class,
+            "ISIN": record.isin,
+            "KIID PDF URL": record.url,
+            "Fact Sheet URL": factsheet.url if factsheet is not None else None
+        })
+    merged_df = pd.DataFrame(
+        rows, columns=["Line", "Fund Name", "Share Class", "ISIN", "KIID PDF URL", "Fact Sheet URL"]
+    )
 
     # === Step 7: Generate clean identifier from Share Class ===
-    def clean_alpha_only(name):
-        if pd.isna(name):
-            return ""
-        name = name.lower()
-        name = re.sub(r'[®¬Æ]', '', name)
-        name = name.replace('class ', '')
-        name = name.replace('accu', 'acc')
-        hedged_suffix = ''
-        match = re.search(r'([a-z]{3})\s*\(hedged\)', name)
-        if match:
-            hedged_suffix = match.group(1) + 'hedged'
-        name = re.sub(r'[^a-z]', '', name)
-        if hedged_suffix:
-            name += hedged_suffix
-        return name
-
-    merged_df["Identifier"] = merged_df["Share Class"].apply(clean_alpha_only)
+    with span("identifiers"):
+        merged_df["Identifier"] = normalize_identifiers(merged_df["Share Class"])
     merged_df = merged_df.drop_duplicates(subset="Identifier", keep="first")
+    if identifiers is not None:
+        merged_df = merged_df[merged_df["Identifier"].isin(set(identifiers))]
+
+    return merged_df
+
+
+def iter_permalink_extraction(merged_df, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT, session=None,
+                              cache_dir=DEFAULT_CACHE_DIR, cache_max_bytes=DEFAULT_MAX_BYTES,
+                              cache_max_age=DEFAULT_MAX_AGE, page_limits=None,
+                              parse_workers=DEFAULT_PARSE_WORKERS, resume=True,
+                              checkpoint_max_age=DEFAULT_CHECKPOINT_MAX_AGE, metrics=None):
+    # === Step 8: Download and extract KIID + Fact Sheet PDFs ===
+    # Yields (row index, extracted fields) for each share class as soon as both its KIID and
+    # its Fact Sheet are done, in completion order.
+    # max_workers I/O threads share one pooled session and hand downloaded PDFs to a pool of
+    # parse_workers processes (see iter_extraction_pipeline). PDFs in the on-disk cache
+    # (cache_dir=None disables it) are served locally while younger than cache_max_age and
+    # revalidated with a conditional request (ETag / Last-Modified) after that. Extracted
+    # fields are kept per document hash, so unchanged PDFs are not parsed again.
+    # With resume=True every finished document is also checkpointed under cache_dir/runs, and
+    # re-running the same permalink export after a crash skips the documents already done, as
+    # long as the interrupted run started less than checkpoint_max_age seconds ago (None: any
+    # time).
+    # metrics (a MetricsRegistry, a new one when None) counts fetches, HTTP errors and timeouts,
+    # parser fallbacks, which rule found each field and the fields left as None
+    cache = PdfCache(cache_dir, max_bytes=cache_max_bytes, max_age=cache_max_age) if cache_dir else None
+    store = ExtractionStore(
+        cache_dir, versions={"kiid": KIID_EXTRACTOR_VERSION, "factsheet": FACTSHEET_EXTRACTOR_VERSION}
+    ) if cache_dir else None
+    parse_stats = ParseStats()
+    if metrics is None:
+        metrics = MetricsRegistry()
+    row_count = len(merged_df)
+    # Each share class's KIID and Fact Sheet are queued next to each other, so share classes
+    # finish (and stream out) one after another instead of all waiting for the last KIIDs
+    jobs = [
+        job
+        for kiid_url, factsheet_url in zip(merged_df["KIID PDF URL"], merged_df["Fact Sheet URL"])
+        for job in (("kiid", kiid_url), ("factsheet", factsheet_url))
+    ]
+    # One "extraction" span over the run (not entered: a generator's yields must not change
+    # the consumer's current span), with a "document" span per PDF under it
+    extraction = start_span("extraction", share_classes=row_count)
+    checkpoint = None
+    if cache_dir and resume:
+        run_id = run_id_for(jobs, KIID_EXTRACTOR_VERSION, FACTSHEET_EXTRACTOR_VERSION, page_limits)
+        checkpoint = RunCheckpoint(run_id, cache_dir, max_age=checkpoint_max_age)
+    partial_rows = {}
+    rows_done = 0
+    try:
+        for job_index, fields in iter_extraction_pipeline(
+            jobs, max_workers=max_workers, parse_workers=parse_workers, timeout=timeout, session=session,
+            cache=cache, store=store, parse_stats=parse_stats, page_limits=page_limits, checkpoint=checkpoint,
+            parent_span=extraction, metrics=metrics
+        ):
+            position = job_index // 2
+            row = partial_rows.setdefault(position, {})
+            row.update(fields)
+            if len(row) == len(EXTRACTED_COLUMNS):
+                rows_done += 1
+                yield merged_df.index[position], partial_rows.pop(position)
+    finally:
+        extraction.end(rows_done=rows_done)
+        if checkpoint is not None:
+            print(checkpoint.format_stats())
+            # A finished run no longer needs its checkpoint; an interrupted one keeps it
+            checkpoint.close(completed=rows_done == row_count)
+        print(parse_stats.format_stats())
+        print(metrics.format_stats())
+        if cache is not None:
+            print(cache.format_stats())
+            cache.close()
+        if store is not None:
+            print(store.format_stats())
+            store.close()
+
+
+def assemble_permalink_frame(merged_df, extracted):
+    # === Step 9: Merge extracted data into final DataFrame ===
+    # extracted maps row index -> fields; rows not extracted yet are left out, so this also
+    # builds the partial frame while a run is still streaming
+    rows = merged_df.loc[[index for index in merged_df.index if index in extracted]]
+    extracted_df = pd.DataFrame(
+        [extracted[index] for index in rows.index], index=rows.index, columns=EXTRACTED_COLUMNS
+    )
+    final_df = pd.concat([rows, extracted_df[["Risk_Reward_Ranking", "Management_Fee"]]], axis=1)
+    final_df["Share_Class_Inception"] = pd.to_datetime(
+        extracted_df["Share_Class_Inception"], errors="coerce"
+    ).dt.strftime("%Y-%m-%d")
+    return final_df
 
-    # === Step 8: Extract SRRI and Management Fee from KIID PDF ===
-    def extract_srri_and_fee(url):
-        try:
-            resp = requests.get(url, timeout=15)
-            resp.raise_for_status()
-            pdf_bytes = resp.content
-            srri_value = management_fee = None
-
-            with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
-                text = "\n".join(page.extract_text() or "" for page in pdf.pages)
-
-            marker = r"Risk and Reward Profile\s*1\s*2\s*3\s*4\s*5\s*6\s*7"
-            parts = re.split(marker, text, flags=re.IGNORECASE | re.DOTALL)
-            if len(parts) >= 2:
-                match = re.search(r"\b\d(\.\d)?\b", parts[1])
-                if match:
-                    srri_value = float(match.group())
-
-            fee_match = re.search(r"Ongoing charges[^%]{0,100}?(\d{1,2}(?:\.\d{1,2})?)\s?%", text, re.IGNORECASE)
-            if fee_match:
-                management_fee = float(fee_match.group(1))
-
-            if srri_value is None or management_fee is None:
-                doc = fitz.open(stream=BytesIO(pdf_bytes), filetype="pdf")
-                full_text = "".join(page.get_text() for page in doc)
-
-                if srri_value is None:
-                    srri_patterns = [
-                        r'The lowest category does not mean that the investment is risk free\D+(\d)',
-                        r'Risk and Reward Profile.*?1\s*2\s*3\s*4\s*5\s*6\s*7.*?(\d)',
-                        r'category\s+(\d)\s+reflects',
-                        r'(?:risk profile|risk and reward).*?([1-7])'
-                    ]
-                    for pattern in srri_patterns:
-                        match = re.search(pattern, full_text, re.IGNORECASE | re.DOTALL)
-                        if match:
-                            srri_value = int(match.group(1))
-                            break
-
-                if management_fee is None:
-                    fee_match = re.search(r"Ongoing charges[^%]{0,100}?(\d{1,2}(?:\.\d{1,2})?)\s?%", full_text, re.IGNORECASE)
-                    if fee_match:
-                        management_fee = float(fee_match.group(1))
-
-        except Exception as e:
-            print(f"❌ Failed to extract SRRI or Fee for {url}: {e}")
-            srri_value = management_fee = None
-
-        return pd.Series({
-            "Risk_Reward_Ranking": srri_value,
-            "Management_Fee": management_fee
-        })
 
-    # === 🔽 ADDED SECTION: Extract Share Class Inception Date from Fact Sheet PDF ===
-    def extract_inception_date(factsheet_url):
-        try:
-            # ✅ Skip rows where the URL is missing or not a proper link
-            if pd.isna(factsheet_url) or not isinstance(factsheet_url, str) or not factsheet_url.startswith("http"):
-                return None
-            resp = requests.get(factsheet_url, timeout=15)
-            resp.raise_for_status()
-            doc = fitz.open(stream=BytesIO(resp.content), filetype="pdf")
-            full_text = "".join(page.get_text() for page in doc)
-
-            # Try to find a date like "01 January 2020" after 'Share Class Inception'
-            # Match date after "Share Class Inception", supporting both "09.05.2017" and "01 January 2020"
-            match = re.search(
-                r"Share Class Inception\s*[:\-]?\s*([0-9]{1,2}[./ -][0-9]{1,2}[./ -][0-9]{2,4}|[0-9]{1,2} [A-Za-z]{3,9} \d{4})",
-                full_text
-            )
-            if match:
-                date_str = match.group(1)
-                date_obj = pd.to_datetime(date_str, dayfirst=True, errors="coerce")
-                if pd.notnull(date_obj):
-                    return date_obj.strftime("%Y-%m-%d")
-        except Exception as e:
-            print(f"❌ Failed to extract inception date for {factsheet_url}: {e}")
-        return None
-# === 🔼 END ADDED SECTION ===
-
-    # === Step 9: Apply extraction functions to KIID and Fact Sheet URLs ===
-    srri_fee_data = merged_df["KIID PDF URL"].apply(extract_srri_and_fee)
-    inception_data = merged_df["Fact Sheet URL"].apply(extract_inception_date)
-
-    # === Step 10: Merge extracted data into final DataFrame ===
-    final_df = pd.concat([merged_df, srri_fee_data], axis=1)
-    final_df["Share_Class_Inception"] = pd.to_datetime(inception_data, errors="coerce").dt.strftime("%Y-%m-%d")
-
-    # === Step 11: Save to CSV and return DataFrame ===
-    final_df.to_csv(output_path, index=False)
-    print(f"✅ Output saved to {output_path}")
+def process_and_extract_permalink_file(file, output_path=None, identifiers=None, outputs=None,
+                                       **extraction_options):
+    # identifiers limits extraction to those share classes (see load_permalink_documents);
+    # outputs (a RunOutputs) receives the result as permalink.parquet and the run's metrics
+    # snapshot, output_path as CSV; with neither, nothing is written. extraction_options are
+    # passed to iter_permalink_extraction (max_workers, parse_workers, timeout, session,
+    # cache_dir, cache_max_bytes, cache_max_age, page_limits, resume, checkpoint_max_age, metrics)
+    extraction_options.setdefault("metrics", MetricsRegistry())
+    with span("permalink"):
+        merged_df = load_permalink_documents(file, identifiers=identifiers)
+    extracted = dict(iter_permalink_extraction(merged_df, **extraction_options))
+    with span("assemble"):
+        final_df = assemble_permalink_frame(merged_df, extracted)
+
+    # === Step 10: Save (when asked) and return DataFrame ===
+    if outputs is not None:
+        outputs.write(PERMALINK, final_df)
+        print(f"✅ Output saved to {outputs.path(PERMALINK)}")
+        print(f"📈 Metrics saved to {extraction_options['metrics'].write(outputs.directory)}")
+    if output_path:
+        final_df.to_csv(output_path, index=False)
+        print(f"✅ Output saved to {output_path}")
     return final_df
-
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from logic.pdf_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_CHECKPOINT_MAX_AGE = 24 * 60 * 60  # an interrupted run can be resumed for a day
+
+
+def run_id_for(jobs, *params):
+    # A run is identified by its (kind, url) jobs plus anything that changes their results
+    # (extractor versions, page limits), so a resumed run only reuses compatible checkpoints
+    h = hashlib.sha256()
+    h.update(json.dumps([list(job) for job in jobs]).encode())
+    h.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return h.hexdigest()[:16]
+
+
+def _created_at(path):
+    # Start time from a checkpoint's header line; None when missing or unreadable
+    try:
+        with open(path, "rb") as f:
+            return float(json.loads(f.readline())["created_at"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def remove_stale_checkpoints(runs_dir, max_age):
+    # Abandoned checkpoints (from runs that crashed or were cancelled and never re-run)
+    # older than max_age seconds (None: they never expire); returns how many were removed
+    removed = 0
+    if max_age is None:
+        return removed
+    for name in os.listdir(runs_dir):
+        if not name.endswith(".jsonl"):
+            continue
+        path = os.path.join(runs_dir, name)
+        created_at = _created_at(path)
+        if created_at is None or time.time() - created_at > max_age:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+class RunCheckpoint:
+    # Append-only JSONL log of finished documents for one extraction run. Every result is
+    # written and flushed as it completes, so a run that dies can be re-invoked and skip
+    # whatever was already done. The file is removed once the run completes.
+    # Resumed fields are never revalidated against the server, so a checkpoint is only
+    # trusted for max_age seconds after its run started (None: no limit); older ones are
+    # deleted when any checkpoint is opened
+
+    def __init__(self, run_id, cache_dir=DEFAULT_CACHE_DIR, max_age=DEFAULT_CHECKPOINT_MAX_AGE):
+        runs_dir = os.path.join(cache_dir, "runs")
+        os.makedirs(runs_dir, exist_ok=True)
+        self.path = os.path.join(runs_dir, f"{run_id}.jsonl")
+        self.expired = remove_stale_checkpoints(runs_dir, max_age)
+        self._done = {}  # (kind, url) -> fields
+        self._lock = threading.Lock()
+        self._load()
+        self.resumed = len(self._done)
+        new = not os.path.exists(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        if new:
+            self._file.write(json.dumps({"created_at": time.time()}) + "\n")
+            self._file.flush()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            valid = len(f.readline())  # created_at header, checked by remove_stale_checkpoints
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                self._done[(entry["kind"], entry["url"])] = entry["fields"]
+                valid += len(line)
+        if valid < os.path.getsize(self.path):
+            # Torn last line from a crash mid-write: keep everything before it
+            with open(self.path, "r+b") as f:
+                f.truncate(valid)
+
+    def get(self, kind, url):
+        with self._lock:
+            return self._done.get((kind, url))
+
+    def record(self, kind, url, fields):
+        line = json.dumps({"kind": kind, "url": url, "fields": fields})
+        with self._lock:
+            if (kind, url) in self._done:
+                return
+            self._done[(kind, url)] = fields
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self, completed=False):
+        with self._lock:
+            self._file.close()
+        if completed:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass  # a concurrent run over the same documents (e.g. a traced re-run) completed first
+
+    def format_stats(self):
+        expired = f", {self.expired} stale checkpoints removed" if self.expired else ""
+        return f"📍 Checkpoint: {self.resumed} documents resumed from {self.path}{expired}"
@@ -0,0 +1,134 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+
+from logic.pdf_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_OUTPUT_DIR = os.environ.get("SRRI_OUTPUT_DIR") or os.path.join(DEFAULT_CACHE_DIR, "outputs")
+DEFAULT_KEEP_RUNS = 100  # newest run directories kept under the output directory
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60  # and none older than 30 days
+
+# <timestamp>-<run id>-<8 hex digits>, so pruning never touches anything else in base_dir
+RUN_DIRECTORY = re.compile(r"^\d{8}-\d{6}-.+-[0-9a-f]{8}$")
+
+# Stage outputs written by a run, by name
+MONITORING = "monitoring"
+PERMALINK = "permalink"
+MISMATCHES = "mismatches"
+
+
+def _arrow_safe(df):
+    # Object columns mixing strings and numbers (e.g. an SRRI read as text in some weeks)
+    # cannot become one Arrow column; store those as strings, keeping missing values missing
+    try:
+        pa.Table.from_pandas(df, preserve_index=False)
+        return df
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        df = df.copy()
+        for col in df.columns[df.dtypes == object]:
+            df[col] = df[col].map(lambda value: value if pd.isna(value) else str(value))
+        return df
+
+
+def prune_run_directories(base_dir, keep=DEFAULT_KEEP_RUNS, max_age=DEFAULT_MAX_AGE):
+    # Remove run directories beyond the `keep` newest and those older than max_age seconds
+    # (either None: no limit); returns how many were removed
+    try:
+        names = [name for name in os.listdir(base_dir) if RUN_DIRECTORY.match(name)]
+    except FileNotFoundError:
+        return 0
+    runs = []
+    for name in names:
+        path = os.path.join(base_dir, name)
+        try:
+            runs.append((os.path.getmtime(path), path))
+        except OSError:
+            pass  # removed by a concurrent run's prune
+    runs.sort(reverse=True)
+    now = time.time()
+    removed = 0
+    for position, (modified_at, path) in enumerate(runs):
+        if (keep is not None and position >= keep) or (max_age is not None and now - modified_at > max_age):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+class RunOutputs:
+    # Per-run output directory (<base_dir>/<timestamp>-<run_id>-<random>/) of Parquet files,
+    # one per stage output, plus a manifest.json listing them. The random suffix gives two
+    # runs started in the same second with the same run_id (or process) separate directories.
+    # Creating one prunes old run directories (see prune_run_directories).
+    # With async_writes=True, write() returns immediately and a background thread does the
+    # encoding and I/O; read() of a name still being written waits for that write first.
+
+    def __init__(self, run_id=None, base_dir=DEFAULT_OUTPUT_DIR, async_writes=False, keep_runs=DEFAULT_KEEP_RUNS,
+                 max_age=DEFAULT_MAX_AGE):
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{run_id or os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.directory = os.path.join(base_dir, name)
+        os.makedirs(base_dir, exist_ok=True)
+        os.makedirs(self.directory, exist_ok=False)
+        prune_run_directories(base_dir, keep_runs, max_age)  # this run's directory is the newest
+        self._pending = {}  # name -> Future
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="srri-output") if async_writes else None
+
+    def path(self, name):
+        return os.path.join(self.directory, f"{name}.parquet")
+
+    def _write(self, name, df):
+        path = self.path(name)
+        tmp_path = f"{path}.tmp"
+        _arrow_safe(df).to_parquet(tmp_path, engine="pyarrow", index=False)
+        os.replace(tmp_path, path)
+        with self._lock:
+            manifest = self._read_manifest()
+            manifest[name] = {"file": os.path.basename(path), "rows": len(df), "written_at": time.time()}
+            with open(os.path.join(self.directory, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+        return path
+
+    def write(self, name, df):
+        # Returns the file path, or a Future of it when writing asynchronously
+        if self._pool is None:
+            return self._write(name, df)
+        future = self._pool.submit(self._write, name, df.copy())
+        with self._lock:
+            self._pending[name] = future
+        future.add_done_callback(lambda f: f.exception() and print(f"❌ Failed to write {name}: {f.exception()}"))
+        return future
+
+    def read(self, name, columns=None):
+        with self._lock:
+            pending = self._pending.get(name)
+        if pending is not None:
+            pending.result()
+        return pd.read_parquet(self.path(name), engine="pyarrow", columns=columns)
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.directory, "manifest.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def wait(self):
+        # Block until every asynchronous write has landed; re-raises the first failure
+        with self._lock:
+            pending = list(self._pending.values())
+        for future in pending:
+            future.result()
+
+    def close(self, wait=True):
+        # With wait=False, queued writes still complete in the background; read() and wait()
+        # keep working on them
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
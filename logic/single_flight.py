@@ -0,0 +1,57 @@
+import threading
+from concurrent.futures import CancelledError, Future
+
+
+class SingleFlight:
+    # Coalesces concurrent work on the same key: the first caller (the leader) does the work,
+    # every caller asking for the key while it is in flight gets the leader's result.
+    # Nothing is cached once the flight lands; that is what the PDF and extraction caches are for.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}  # key -> Future
+
+    def claim(self, key):
+        # Returns (future, True) when the caller must do the work and then resolve() the key,
+        # or (future, False) to wait on (or add a callback to) the leader's future
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = Future()
+            self._flights[key] = flight
+            return flight, True
+
+    def resolve(self, key, flight, result=None, error=None):
+        # Land a flight claimed as leader. An error of CancelledError tells waiting callers
+        # the leader gave up, so they claim the key and do the work themselves
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        if flight.done():
+            return
+        if error is not None:
+            flight.set_exception(error)
+        else:
+            flight.set_result(result)
+
+    def do(self, key, fn):
+        # Blocking form: run fn() as leader, or wait for the flight already under way
+        while True:
+            flight, leader = self.claim(key)
+            if not leader:
+                try:
+                    return flight.result()
+                except CancelledError:
+                    continue
+            try:
+                result = fn()
+            except BaseException as e:
+                self.resolve(key, flight, error=e)
+                raise
+            self.resolve(key, flight, result)
+            return result
+
+    def __len__(self):
+        with self._lock:
+            return len(self._flights)
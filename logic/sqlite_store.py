@@ -0,0 +1,33 @@
+import sqlite3
+import threading
+
+
+class SqliteStore:
+    # Base for the on-disk caches: one SQLite connection per thread, WAL mode so
+    # readers in other threads or processes are never blocked by a writer
+
+    def __init__(self, path, schema):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(schema)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
@@ -1,7 +1,7 @@
 import pandas as pd
 # pip install openpyxl
 # pip install pandas
-import re
+from logic.identifiers import normalize_identifiers
 
 def process_monitoring_file(file):
     # include everything from your Excel logic (STEP 1–10)
@@ -95,44 +95,7 @@ def process_monitoring_file(file):
     First Trust US Equity Income UCITS ETF Class B ACCU	                    USD
     First Trust FactorFX UCITS ETF Class A USD ACCU	                        USD
     """
-    def generate_identifier(share_class, currency):
-        if pd.isna(share_class):
-            return ""
-
-        original = share_class.lower()
-        name = original
-
-        # Normalize known variants
-        name = re.sub(r'[®¬Æ]', '', name)
-        name = name.replace('class ', '')
-        name = name.replace('accu', 'acc')
-
-        # Extract Hedged logic
-        hedged_suffix = ''
-        match = re.search(r'([a-z]{3})\s*\(hedged\)', original)
-        if match:
-            hedged_suffix = match.group(1) + 'hedged'
-
-        # Remove all non-alphabet characters
-        name = re.sub(r'[^a-z]', '', name)
-
-        # Remove currency from middle if present
-        currency_lower = currency.lower()
-        name = name.replace(currency_lower, '')
-
-        # Add currency back to the end
-        name += currency_lower
-
-        # Add hedged if found
-        if hedged_suffix:
-            name += 'hedged'
-
-        return name
-
-
-    df["Identifier"] = df.apply(
-        lambda row: generate_identifier(row.get("Share Class", ""), row.get("Currency", "")), axis=1
-    )
+    df["Identifier"] = normalize_identifiers(df["Share Class"], df["Currency"])
 
     # === STEP 9: Build final summary for delivery or reporting ===
     columns_to_show = {
@@ -177,11 +140,11 @@ def process_monitoring_file(file):
     # 10.4 Format date back to string format YYYY-MM-DD (common format for output)
     summary_df["Last validated document"] = summary_df["Last validated document"].dt.strftime("%Y-%m-%d")
 
-    # 10.5 Export cleaned and deduplicated results
-    summary_df.to_csv("srri_summary_output_2.csv", index=False)
+    # 10.5 Cleaned and deduplicated results are returned, not exported; callers persist them
+    #      (e.g. RunOutputs.write("monitoring", summary_df)) if they need a copy on disk
     #summary_df.to_excel("srri_summary_output_V2.xlsx", index=False)
 
-    print("✅ Clean SRRI summary created and exported as 'srri_summary_output_2.csv'")
+    print("✅ Clean SRRI summary created")
 
     return summary_df  # Return the final summary DataFrame for further use or testing
 ()
@@ -1,8 +1,68 @@
+import numpy as np
 import pandas as pd
-import re
-
-def process_monitoring_file(file):
-    raw_df = pd.read_excel(file, header=None)
+from logic.identifiers import normalize_identifiers
+from logic.tracing import span
+from logic.workbook_reader import format_load, read_monitoring_workbook
+
+
+def summarize_srri_changes(df, srri_columns):
+    # Stability and change detection over the weekly SRRI columns, computed on the whole
+    # (rows x weeks) block at once instead of row by row. Values are compared as strings
+    # (as read from the workbook) and empty weeks are skipped.
+    rows, weeks = len(df), len(srri_columns)
+    if weeks == 0:
+        # No weekly SRRI columns: nothing is stable and there is no SRRI to report
+        return pd.DataFrame({
+            "SRRI Stable (All Weeks)": np.zeros(rows, dtype=bool),
+            "Previous SRRI": None, "Latest SRRI": None, "Week of SRRI Change": None, "Date of SRRI Change": None,
+        }, index=df.index)
+    values = df[srri_columns].to_numpy(dtype=object)
+    present = df[srri_columns].notna().to_numpy()
+
+    # Integer code per distinct string so comparisons are plain array ops
+    codes, labels = pd.factorize(values.astype(str).ravel())
+    codes = np.where(present, codes.reshape(rows, weeks), -1)
+
+    has_value = present.any(axis=1)
+    row_ids = np.arange(rows)
+    last_week = weeks - 1 - np.argmax(present[:, ::-1], axis=1)
+    latest = codes[row_ids, last_week]
+
+    # Last filled week whose value differs from the latest one
+    differs = present & (codes != latest[:, None])
+    changed = differs.any(axis=1)
+    last_diff = weeks - 1 - np.argmax(differs[:, ::-1], axis=1)
+    stable = has_value & ~changed
+
+    # The change happened at the first filled week after last_diff (backward-filled column index)
+    filled_at = np.where(present, np.arange(weeks), weeks)
+    next_filled = np.minimum.accumulate(filled_at[:, ::-1], axis=1)[:, ::-1]
+    # (clipped so unchanged rows, which are masked out below, still index a real column)
+    change_week = np.minimum(next_filled[row_ids, np.minimum(last_diff + 1, weeks - 1)], weeks - 1)
+
+    # Report date column of the same week, where the workbook has one
+    report_columns = [col.replace("SRRI Result", "SRRI Report") for col in srri_columns]
+    reports = np.array([
+        df[col].to_numpy(dtype=object) if col in df.columns else np.full(rows, None, dtype=object)
+        for col in report_columns
+    ], dtype=object).T.reshape(rows, weeks)
+
+    labels = np.asarray(labels, dtype=object)
+    week_names = np.array(srri_columns, dtype=object)
+    latest_srri = np.where(has_value, labels[latest], None)
+    return pd.DataFrame({
+        "SRRI Stable (All Weeks)": stable,
+        "Previous SRRI": np.where(changed, labels[codes[row_ids, last_diff]], latest_srri),
+        "Latest SRRI": latest_srri,
+        "Week of SRRI Change": np.where(changed, week_names[change_week], None),
+        "Date of SRRI Change": np.where(changed, reports[row_ids, change_week], None),
+    }, index=df.index)
+
+
+def process_monitoring_file(file, engine=None):
+    # === STEP 1: Load the identity + weekly SRRI columns of the workbook ===
+    raw_df, load = read_monitoring_workbook(file, engine)
+    print(format_load(load))
 
     # === STEP 2: Construct meaningful column headers ===
     week_row = raw_df.iloc[0]
@@ -32,55 +92,15 @@ def process_monitoring_file(file):
     # === STEP 5: Identify SRRI columns ===
     srri_columns = [col for col in df.columns if "SRRI Result (Week" in col]
 
-    # === STEP 6: Check for SRRI stability ===
-    df["SRRI Stable (All Weeks)"] = df.apply(
-        lambda row: row[srri_columns].dropna().astype(str).nunique() == 1, axis=1
-    )
-
-    # === STEP 7: Extract change info ===
-    def extract_srri_change_info(row):
-        srri_series = row[srri_columns].dropna()
-        srri_values = srri_series.astype(str).tolist()
-        week_names = srri_series.index.tolist()
-
-        previous_srri = latest_srri = change_week = change_date = None
-        if srri_values:
-            latest_srri = srri_values[-1]
-            previous_srri = next((v for v in reversed(srri_values[:-1]) if v != latest_srri), latest_srri)
-            for i in range(len(srri_values) - 2, -1, -1):
-                if srri_values[i] != latest_srri:
-                    change_week = week_names[i + 1]
-                    corresponding_report_col = change_week.replace("SRRI Result", "SRRI Report")
-                    if corresponding_report_col in row.index:
-                        change_date = row[corresponding_report_col]
-                    break
-
-        return pd.Series({
-            "Previous SRRI": previous_srri,
-            "Latest SRRI": latest_srri,
-            "Week of SRRI Change": change_week,
-            "Date of SRRI Change": change_date
-        })
-
-    df = pd.concat([df, df.apply(extract_srri_change_info, axis=1)], axis=1)
+    # === STEP 6 + 7: Check for SRRI stability and extract change info ===
+    with span("srri_changes", rows=len(df), weeks=len(srri_columns)):
+        change_info = summarize_srri_changes(df, srri_columns)
+    df["SRRI Stable (All Weeks)"] = change_info.pop("SRRI Stable (All Weeks)")
+    df = pd.concat([df, change_info], axis=1)
 
     # === STEP 8: Generate Identifier ===
-    def generate_identifier(share_class, currency):
-        if pd.isna(share_class): return ""
-        name = share_class.lower()
-        name = re.sub(r'[®¬Æ]', '', name).replace('class ', '').replace('accu', 'acc')
-        hedged_suffix = ''
-        match = re.search(r'([a-z]{3})\s*\(hedged\)', name)
-        if match: hedged_suffix = match.group(1) + 'hedged'
-        name = re.sub(r'[^a-z]', '', name)
-        name = name.replace(currency.lower(), '') + currency.lower()
-        if hedged_suffix: name += hedged_suffix
-        return name
-
-    df["Identifier"] = df.apply(
-        lambda row: generate_identifier(row.get("Share Class", ""), row.get("Currency", "")),
-        axis=1
-    )
+    with span("identifiers"):
+        df["Identifier"] = normalize_identifiers(df["Share Class"], df["Currency"])
 
     # === STEP 9: Select and rename output columns ===
     columns_to_show = {
@@ -0,0 +1,84 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 60 * 60  # keep stage results for an hour
+DEFAULT_MAX_ENTRIES = 32
+
+
+def file_digest(file):
+    # sha256 of an upload's bytes (Streamlit UploadedFile, file-like object or path)
+    if isinstance(file, str):
+        with open(file, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    if hasattr(file, "getvalue"):
+        return hashlib.sha256(file.getvalue()).hexdigest()
+    position = file.tell()
+    digest = hashlib.sha256(file.read()).hexdigest()
+    file.seek(position)
+    return digest
+
+
+class StageCache:
+    # In-memory memo of pipeline stage results keyed by (stage, input digest, parameters).
+    # Entries expire after ttl seconds and the least recently used ones are dropped beyond
+    # max_entries, so reruns of the same upload skip the work but memory stays bounded.
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(stage, digest, params=None):
+        return stage, digest, tuple(sorted((params or {}).items()))
+
+    def get(self, stage, digest, params=None, max_age=None):
+        # Returns (value, stored_at), or None when missing or expired. max_age (seconds) is a
+        # caller's own, shorter freshness limit: an entry older than that is not returned to
+        # that caller but stays for others until it outlives the cache's ttl
+        key = self.make_key(stage, digest, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            age = time.time() - entry[1]
+            if self.ttl is not None and age > self.ttl:
+                del self._entries[key]
+                return None
+            if max_age is not None and age > max_age:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, stage, digest, value, params=None):
+        key = self.make_key(stage, digest, params)
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def get_or_compute(self, stage, digest, compute, params=None, max_age=None):
+        entry = self.get(stage, digest, params, max_age)
+        if entry is not None:
+            return entry[0]
+        return self.put(stage, digest, compute(), params)
+
+    def invalidate(self, stage=None, digest=None):
+        # Drop every entry matching the given stage and/or digest (no arguments: everything)
+        with self._lock:
+            doomed = [
+                key for key in self._entries
+                if (stage is None or key[0] == stage) and (digest is None or key[1] == digest)
+            ]
+            for key in doomed:
+                del self._entries[key]
+        return len(doomed)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,206 @@
+import contextvars
+import json
+import os
+import threading
+import time
+
+# Span of the code running right now, per thread / task. None (the default) means tracing is
+# off: span() then hands back the shared no-op span and nothing is recorded
+_current = contextvars.ContextVar("srri_current_span", default=None)
+
+
+class _NoopSpan:
+    id = None
+
+    def set(self, **attrs):
+        pass
+
+    def end(self, **attrs):
+        pass
+
+    def record(self, name, seconds, **attrs):
+        pass
+
+    def child(self, name, **attrs):
+        return self
+
+    def activate(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    # One timed piece of work in a Trace. Used as a context manager it becomes the parent of
+    # spans opened inside it and ends on exit; spans from start_span() / child() are ended
+    # explicitly instead, possibly from another thread
+
+    def __init__(self, trace, parent_id, name, attrs):
+        self.trace = trace
+        self.id = trace._next_id()
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.thread = threading.current_thread().name
+        self._tokens = []
+        self._ended = False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def end(self, **attrs):
+        if self._ended:
+            return
+        self._ended = True
+        self.attrs.update(attrs)
+        self.trace._add(self.id, self.parent_id, self.name, self.start, time.perf_counter(), self.thread, self.attrs)
+
+    def record(self, name, seconds, **attrs):
+        # Child span for work timed somewhere else (e.g. in a parse worker process), taken to
+        # have ended just now
+        end = time.perf_counter()
+        thread = threading.current_thread().name
+        self.trace._add(self.trace._next_id(), self.id, name, end - seconds, end, thread, attrs)
+
+    def child(self, name, **attrs):
+        # Child span opened explicitly, e.g. per document from a pipeline that hands the work
+        # to other threads; call .end() when done
+        return Span(self.trace, self.id, name, attrs)
+
+    def activate(self):
+        # Context manager: make this the current span without ending it on exit
+        return _Activation(self)
+
+    def __enter__(self):
+        self._tokens.append(_current.set(self))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._tokens.pop())
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.end()
+        return False
+
+
+class _Activation:
+    def __init__(self, span):
+        self.span = span
+
+    def __enter__(self):
+        self._token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, *exc_info):
+        _current.reset(self._token)
+        return False
+
+
+def current_span():
+    return _current.get() or NOOP_SPAN
+
+
+def span(name, **attrs):
+    # Timed child of the current span: with span("download", url=url) as s: ... s.set(bytes=n)
+    parent = _current.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(parent.trace, parent.id, name, attrs)
+
+
+def start_span(name, **attrs):
+    # Child of the current span that outlives the calling block (e.g. across a generator's
+    # yields, which must not change the consumer's current span); call .end() when done
+    return span(name, **attrs)
+
+
+class Trace:
+    # All spans of one run. `with Trace("srri_check") as root:` turns tracing on for the code
+    # inside; the root span covers the whole block. Threads started inside it start without a
+    # current span, so pools pass a parent along (span.child(), span.activate()).
+    # Thread-safe: spans end from any thread.
+
+    def __init__(self, name, run_id=None, **attrs):
+        self.name = name
+        self.run_id = run_id
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._ids = 0
+        self.spans = []  # (id, parent_id, name, start, end, thread, attrs)
+        self.root = Span(self, None, name, attrs)
+
+    def _next_id(self):
+        with self._lock:
+            self._ids += 1
+            return self._ids
+
+    def _add(self, span_id, parent_id, name, start, end, thread, attrs):
+        with self._lock:
+            self.spans.append((span_id, parent_id, name, start, end, thread, dict(attrs)))
+
+    def __enter__(self):
+        return self.root.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self.root.__exit__(*exc_info)
+
+    def to_dict(self):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s[3])
+        origin = self.root.start
+        return {
+            "name": self.name,
+            "run_id": self.run_id,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "spans": [
+                {"id": span_id, "parent": parent_id, "name": name, "start": round(start - origin, 6),
+                 "seconds": round(end - start, 6), "thread": thread, "attrs": attrs}
+                for span_id, parent_id, name, start, end, thread, attrs in spans
+            ],
+        }
+
+    def write(self, path):
+        # JSON trace of the run; path may be a directory (the file is then trace.json in it)
+        if os.path.isdir(path):
+            path = os.path.join(path, "trace.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=1, default=str)
+        return path
+
+    def summary(self):
+        # Where the time went: one row per span path (e.g. "monitoring/identifiers"), in order
+        # of first start. Per-document spans run concurrently, so their total is busy time
+        # across threads, not wall-clock time
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s[0])
+        paths = {self.root.id: ""}
+        rows = {}
+        for span_id, parent_id, name, start, end, _, attrs in spans:
+            if span_id == self.root.id:
+                continue
+            parent_path = paths.get(parent_id, "")
+            path = paths[span_id] = f"{parent_path}/{name}" if parent_path else name
+            row = rows.setdefault(path, {"span": path, "depth": path.count("/") + 1, "count": 0,
+                                         "total_seconds": 0.0, "max_seconds": 0.0, "errors": 0, "start": start})
+            row["count"] += 1
+            row["total_seconds"] += end - start
+            row["max_seconds"] = max(row["max_seconds"], end - start)
+            row["errors"] += "error" in attrs
+        ordered = sorted(rows.values(), key=lambda row: row["start"])
+        for row in ordered:
+            del row["start"]
+        return ordered
+
+    def format_stats(self):
+        stages = [row for row in self.summary() if row["depth"] == 1]
+        if not stages:
+            return "🧭 Trace: no spans recorded"
+        return "🧭 Trace: " + ", ".join(f"{row['span']} {row['total_seconds']:.2f}s" for row in stages)
@@ -0,0 +1,110 @@
+import time
+from collections import namedtuple
+
+import pandas as pd
+
+from logic.tracing import span
+
+CALAMINE = "calamine"
+OPENPYXL = "openpyxl"
+
+# Identity columns of the monitoring workbook (row 1 labels); every other column is kept only
+# if it is one of the weekly SRRI Report / SRRI Result columns
+IDENTITY_COLUMNS = {"Fund", "Sub-Fund", "Share Class", "Currency", "last validated document date"}
+WEEK_COLUMNS = {"SRRI Report", "SRRI Result"}
+
+WorkbookLoad = namedtuple("WorkbookLoad", ["engine", "rows", "columns_kept", "columns_total", "seconds"])
+
+
+def available_engine():
+    # The Rust calamine reader when python-calamine is installed, else openpyxl
+    try:
+        import python_calamine  # noqa: F401
+        return CALAMINE
+    except ImportError:
+        return OPENPYXL
+
+
+def _convert(value):
+    # Same cell conversion as pd.read_excel: empty -> NaN, integral floats -> int
+    if value is None or value == "":
+        return float("nan")
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _rows_with_calamine(file):
+    from python_calamine import CalamineWorkbook
+    if isinstance(file, str):
+        workbook = CalamineWorkbook.from_path(file)
+    else:
+        workbook = CalamineWorkbook.from_filelike(file)
+    sheet = workbook.get_sheet_by_index(0)
+    # iter_rows() converts one row at a time (to_python() would build every cell of the sheet
+    # before any column is dropped). Its rows start at the first used column, so they are
+    # padded back to column A to keep the original positions
+    padding = [""] * sheet.start[1]
+    try:
+        for row in sheet.iter_rows():
+            yield padding + row if padding else row
+    finally:
+        workbook.close()
+
+
+def _rows_with_openpyxl(file):
+    from openpyxl import load_workbook
+    # read_only streams the sheet XML row by row instead of building every cell object
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+_ENGINES = {CALAMINE: _rows_with_calamine, OPENPYXL: _rows_with_openpyxl}
+
+
+def _wanted_columns(labels):
+    return [
+        position for position, label in enumerate(labels)
+        if isinstance(label, str) and (label.strip() in IDENTITY_COLUMNS or label.strip() in WEEK_COLUMNS)
+    ]
+
+
+def read_monitoring_workbook(file, engine=None):
+    # First sheet of the monitoring workbook as pd.read_excel(file, header=None) would return
+    # it (row 0 = week labels, row 1 = column labels), but with only the identity and weekly
+    # SRRI columns. The original column positions are kept as column labels.
+    # Returns (raw_df, WorkbookLoad)
+    engine = engine or available_engine()
+    start = time.perf_counter()
+    with span("read_workbook", engine=engine) as read:
+        rows = _ENGINES[engine](file)
+        try:
+            week_row = next(rows, ())
+            label_row = next(rows, ())
+            keep = _wanted_columns(label_row)
+            data = [
+                [_convert(week_row[i] if i < len(week_row) else None) for i in keep],
+                [_convert(label_row[i]) for i in keep],
+            ]
+            for row in rows:
+                data.append([_convert(row[i]) if i < len(row) else float("nan") for i in keep])
+        finally:
+            rows.close()
+        read.set(rows=len(data) - 2, columns=len(keep))
+
+    # Drop trailing rows with nothing in them, as pd.read_excel does
+    while len(data) > 2 and all(pd.isna(value) for value in data[-1]):
+        data.pop()
+    raw_df = pd.DataFrame(data, columns=keep)
+    load = WorkbookLoad(engine, len(raw_df), len(keep), len(label_row), time.perf_counter() - start)
+    return raw_df, load
+
+
+def format_load(load):
+    return (
+        f"📗 Monitoring workbook: {load.rows} rows, {load.columns_kept}/{load.columns_total} columns "
+        f"read with {load.engine} in {load.seconds:.2f}s"
+    )
@@ -0,0 +1,147 @@
+# Headless SRRI check: monitoring workbook(s) + permalink export -> mismatches, without Streamlit.
+# Runs process_monitoring_file -> process_and_extract_permalink_file -> compare_srri_values on
+# file paths and writes the outputs to a per-run directory (see logic/run_outputs.py).
+# Several workbooks share one extraction pass and get one mismatch report each
+# (see logic/batch_reconcile.py).
+# Extraction metrics (fetches, HTTP errors / timeouts, parser fallbacks, matched rules, missing
+# fields) are written to the run directory as metrics.prom / metrics.json.
+# Exit status: 0 = no mismatches, 1 = mismatches found, 2 = the run (or any workbook) failed.
+# Usage: python srri_cli.py MONITORING.xlsx [MORE.xlsx ...] PERMALINK.csv [--format parquet] ...
+import argparse
+import os
+import sys
+import time
+
+from logic.batch_reconcile import batch_output_frames, reconcile_batch
+from logic.extraction_pipeline import DEFAULT_PARSE_WORKERS
+from logic.metrics import MetricsRegistry, MetricsServer
+from logic.pdf_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_AGE, DEFAULT_MAX_BYTES
+from logic.pdf_fetcher import DEFAULT_MAX_WORKERS, DEFAULT_TIMEOUT
+from logic.run_checkpoint import DEFAULT_CHECKPOINT_MAX_AGE
+from logic.run_outputs import DEFAULT_OUTPUT_DIR, RunOutputs
+from logic.tracing import NOOP_SPAN, Trace, span
+from logic.workbook_reader import CALAMINE, OPENPYXL
+
+EXIT_OK = 0
+EXIT_MISMATCHES = 1
+EXIT_ERROR = 2
+
+OUTPUT_FORMATS = ["parquet", "csv", "both", "none"]
+
+
+def write_outputs(frames, output_format, output_dir, run_id):
+    # frames: name -> DataFrame. Returns the run directory, or None when nothing is written
+    if output_format == "none":
+        return None
+    outputs = RunOutputs(run_id=run_id, base_dir=output_dir)
+    for name, df in frames.items():
+        if output_format in ("parquet", "both"):
+            outputs.write(name, df)
+        if output_format in ("csv", "both"):
+            df.to_csv(os.path.join(outputs.directory, f"{name}.csv"), index=False)
+    outputs.close()
+    return outputs.directory
+
+
+def run(args):
+    start = time.perf_counter()
+    trace = Trace("srri_check", run_id=args.run_id) if args.trace else None
+    metrics = MetricsRegistry()
+    server = None
+    if args.metrics_port is not None:
+        server = MetricsServer(metrics, port=args.metrics_port).start()
+        print(f"📈 Live metrics at {server.url} (JSON: {server.url}.json)")
+
+    try:
+        with trace or NOOP_SPAN:
+            # === Step 1-3: Monitoring workbooks + one permalink extraction pass -> per-workbook mismatches ===
+            # Unless --full-scan, only share classes in some monitoring summary are extracted
+            df_permalink, reports = reconcile_batch(
+                args.monitoring, args.permalink, engine=args.engine, workbook_workers=args.workbook_workers,
+                full_scan=args.full_scan, max_workers=args.max_workers, parse_workers=args.parse_workers,
+                timeout=args.timeout, cache_dir=None if args.no_cache else args.cache_dir,
+                cache_max_bytes=args.cache_max_mb * 1024 * 1024, cache_max_age=args.cache_max_age,
+                resume=not args.no_resume, checkpoint_max_age=args.checkpoint_max_age, metrics=metrics
+            )
+
+            # === Step 4: Write outputs ===
+            with span("write_outputs", format=args.format):
+                directory = write_outputs(
+                    batch_output_frames(df_permalink, reports), args.format, args.output_dir, args.run_id
+                )
+    finally:
+        if server is not None:
+            server.stop()
+    if directory:
+        print(f"✅ Outputs ({args.format}) saved to {directory}")
+        print(f"📈 Metrics saved to {metrics.write(directory)}")
+    if trace is not None:
+        # The trace goes with the run's outputs (a run directory of its own with --format none)
+        directory = directory or RunOutputs(run_id=args.run_id, base_dir=args.output_dir).directory
+        print(trace.format_stats())
+        print(f"🧭 Trace saved to {trace.write(directory)}")
+
+    elapsed = time.perf_counter() - start
+    print(f"🏁 {len(reports)} workbook(s), {len(df_permalink)} share classes extracted in {elapsed:.1f}s")
+    for report in reports:
+        if report.error is not None:
+            print(f"❌ {report.name}: failed ({report.error})")
+        elif report.mismatches.empty:
+            print(f"✅ {report.name}: no SRRI mismatches")
+        else:
+            print(f"⚠️ {report.name}: {len(report.mismatches)} mismatches")
+
+    if any(report.error is not None for report in reports):
+        return EXIT_ERROR
+    if any(not report.mismatches.empty for report in reports):
+        return EXIT_MISMATCHES
+    return EXIT_OK
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconcile monitoring SRRI values against KIID / Fact Sheet PDFs.")
+    parser.add_argument("monitoring", nargs="+", help="SRRI monitoring workbook(s) (.xlsx)")
+    parser.add_argument("permalink", help="Permalink export (.csv)")
+
+    concurrency = parser.add_argument_group("concurrency")
+    concurrency.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS, help="download threads")
+    concurrency.add_argument("--parse-workers", type=int, default=DEFAULT_PARSE_WORKERS, help="PDF parse processes")
+    concurrency.add_argument("--workbook-workers", type=int, help="workbook processes (default: one per CPU)")
+    concurrency.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="per-request timeout (seconds)")
+
+    cache = parser.add_argument_group("cache")
+    cache.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="PDF / extraction cache and checkpoints")
+    cache.add_argument("--no-cache", action="store_true", help="download and parse every PDF; no checkpoint")
+    cache.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024))
+    cache.add_argument("--cache-max-age", type=int, default=DEFAULT_MAX_AGE,
+                       help="seconds before a cached PDF is revalidated")
+    cache.add_argument("--no-resume", action="store_true", help="ignore the checkpoint of an interrupted run")
+    cache.add_argument("--checkpoint-max-age", type=int, default=DEFAULT_CHECKPOINT_MAX_AGE,
+                       help="seconds an interrupted run's checkpoint can be resumed")
+
+    output = parser.add_argument_group("output")
+    output.add_argument("--format", choices=OUTPUT_FORMATS, default="parquet")
+    output.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help="parent of the per-run output directory")
+    output.add_argument("--run-id", help="part of the run directory name (default: process id)")
+
+    parser.add_argument("--engine", choices=[CALAMINE, OPENPYXL], help="workbook reader (default: fastest installed)")
+    parser.add_argument("--full-scan", action="store_true",
+                        help="extract every share class in the permalink export, not only the monitored ones")
+    parser.add_argument("--trace", action="store_true",
+                        help="record per-stage and per-document timing spans to trace.json in the run directory")
+    parser.add_argument("--metrics-port", type=int,
+                        help="serve live extraction metrics (Prometheus text) on this port during the run")
+    args = parser.parse_args(argv)
+
+    try:
+        return run(args)
+    except KeyboardInterrupt:
+        print("⏹️ Interrupted; re-run the same command to resume from the checkpoint", file=sys.stderr)
+        return EXIT_ERROR
+    except Exception as e:
+        print(f"❌ SRRI check failed: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import threading
+from concurrent.futures import CancelledError
+
+import pytest
+
+from benchmarks.doc_server import DocumentServer
+from benchmarks.synthetic import document_url, srri_for
+from logic.extraction_pipeline import DEFAULT_PAGE_LIMITS, iter_extraction_pipeline
+from logic.single_flight import SingleFlight
+
+
+class LeaderDied(Exception):
+    pass
+
+
+class WatchedFlights(SingleFlight):
+    # Signals once a second caller joins a flight that is already under way
+    def __init__(self):
+        super().__init__()
+        self.followed = threading.Event()
+
+    def claim(self, key):
+        flight, leader = super().claim(key)
+        if not leader:
+            self.followed.set()
+        return flight, leader
+
+
+def test_concurrent_callers_share_one_result():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    results = []
+    callers = [threading.Thread(target=lambda: results.append(flights.do("key", work))) for _ in range(4)]
+    for caller in callers:
+        caller.start()
+    release.set()
+    for caller in callers:
+        caller.join(5)
+    assert results == ["result"] * 4
+    assert calls == [1]
+    assert len(flights) == 0
+
+
+def test_waiter_takes_over_a_cancelled_flight():
+    flights = SingleFlight()
+    flight, leader = flights.claim("key")
+    assert leader
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(flights.do("key", lambda: "own result")))
+    waiter.start()
+    flights.resolve("key", flight, error=CancelledError())
+    waiter.join(5)
+    assert results == ["own result"]
+
+
+@pytest.mark.parametrize("parse_workers", [0, 2])
+def test_pipeline_follower_completes_when_its_leader_raises(parse_workers):
+    # Two runs on the same KIID: a blocking leader that dies mid-document, and a pipeline run
+    # following it, which must take the document over instead of waiting for it forever
+    flights = WatchedFlights()
+    with DocumentServer() as server:
+        url = document_url(server.url, 0, "KIID.pdf")
+        leading = threading.Event()
+        errors = []
+
+        def die():
+            leading.set()
+            flights.followed.wait(5)
+            raise LeaderDied()
+
+        def leader_run():
+            try:
+                flights.do(("kiid", url, DEFAULT_PAGE_LIMITS["kiid"]), die)
+            except LeaderDied as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=leader_run)
+        leader.start()
+        assert leading.wait(5)
+        results = []
+        # A daemon thread, so a follower that never completes fails the test instead of hanging it
+        follower = threading.Thread(target=lambda: results.extend(iter_extraction_pipeline(
+            [("kiid", url)], max_workers=2, parse_workers=parse_workers, timeout=5, flights=flights
+        )), daemon=True)
+        follower.start()
+        follower.join(30)
+        leader.join(5)
+
+    assert not follower.is_alive(), "the following run never completed its document"
+
+    assert len(errors) == 1
+    assert flights.followed.is_set()
+    assert [index for index, _ in results] == [0]
+    assert results[0][1]["Risk_Reward_Ranking"] == srri_for(0)
+    assert len(flights) == 0